@@ -0,0 +1,34 @@
+import time
+
+from django.core.cache import cache
+
+# Shared by the user views, accounts.signals and the bulk importers, so
+# none of them has to import another just to find a cache key.
+USER_COUNT_CACHE_KEY = "accounts:user_count"
+USER_LIST_CACHE_VERSION_KEY = "accounts:user_list:version"
+
+
+def user_list_cache_version():
+    """
+    Current version of the cached user list pages; part of every page's key.
+    """
+    return cache.get_or_set(USER_LIST_CACHE_VERSION_KEY, 0, timeout=None)
+
+
+def invalidate_user_count_cache():
+    cache.delete(USER_COUNT_CACHE_KEY)
+
+
+def invalidate_user_list_cache():
+    """
+    Bump the version so every cached page of the user list goes stale at once.
+    """
+    cache.set(USER_LIST_CACHE_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_user_caches():
+    """
+    For bulk writes, which send no post_save: drop the count and the list.
+    """
+    invalidate_user_count_cache()
+    invalidate_user_list_cache()
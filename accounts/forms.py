@@ -34,7 +34,7 @@ class CustomUserCreationForm(UserCreationForm):
         """
         Validate that the supplied email address is unique for the site.
         """
-        email = self.cleaned_data['email']
+        email = CustomUser.objects.normalize_email(self.cleaned_data['email'])
         if CustomUser.objects.filter(email=email).exists():
             raise ValidationError(_("A user with that email already exists."))
         return email
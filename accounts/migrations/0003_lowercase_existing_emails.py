@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-15 08:45
+
+from django.db import migrations
+from django.db.models.functions import Lower, Trim
+
+
+def lowercase_emails(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    CustomUser.objects.update(email=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
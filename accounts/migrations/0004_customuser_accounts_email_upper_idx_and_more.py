@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-15 08:46
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_lowercase_existing_emails'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('recommendations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='accounts_email_upper_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.CheckConstraint(condition=models.Q(('email', django.db.models.functions.text.Lower('email'))), name='accounts_email_lowercase_ck', violation_error_message='Email addresses must be stored in lowercase.'),
+        ),
+    ]
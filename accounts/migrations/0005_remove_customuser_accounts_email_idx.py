@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-15 09:52
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_customuser_accounts_email_upper_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='accounts_email_idx',
+        ),
+    ]
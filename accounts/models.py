@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower, Upper
 from django.contrib.auth.models import (
     AbstractBaseUser,
     PermissionsMixin,
@@ -13,6 +14,17 @@ class CustomUserManager(BaseUserManager):
     """
     Custom user manager where email is the unique identifier for authentication.
     """
+    @classmethod
+    def normalize_email(cls, email):
+        """
+        Emails are stored trimmed and fully lowercased so lookups can use a
+        plain (indexed) equality instead of ``__iexact``.
+        """
+        return (email or '').strip().lower()
+
+    def get_by_natural_key(self, username):
+        return self.get(**{self.model.USERNAME_FIELD: self.normalize_email(username)})
+
     def create_user(self, email, password=None, **extra_fields):
         """
         Create and save a regular User with the given email and password.
@@ -90,17 +102,39 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         verbose_name = _('user')
         verbose_name_plural = _('users')
         ordering = ['-date_joined']
+        # email's unique=True already builds the btree for exact lookups
         indexes = [
-            models.Index(fields=['email'], name='accounts_email_idx'),
+            # django_rest_passwordreset looks users up with email__iexact,
+            # which compiles to UPPER("email") = UPPER(%s) on PostgreSQL.
+            models.Index(Upper('email'), name='accounts_email_upper_idx'),
         ]
+        constraints = [
+            # Emails are stored lowercased, so plain equality lookups are exact
+            # and unique=True is already case-insensitive uniqueness.
+            models.CheckConstraint(
+                condition=models.Q(email=Lower('email')),
+                name='accounts_email_lowercase_ck',
+                violation_error_message=_("Email addresses must be stored in lowercase."),
+            ),
+        ]
+
+    def normalize_fields(self, fields=None):
+        """
+        Lowercase the email and trim the names in place. ``fields`` limits the
+        work to the columns about to be written (``None`` means all of them).
+        Called by save(), and directly by code paths that bypass it, such as
+        bulk_create.
+        """
+        if fields is None or 'email' in fields:
+            if self.email:
+                self.email = self.__class__.objects.normalize_email(self.email)
+        if fields is None or 'first_name' in fields:
+            self.first_name = self.first_name.strip()
+        if fields is None or 'last_name' in fields:
+            self.last_name = self.last_name.strip()
 
     def save(self, *args, **kwargs):
-        # Normalize the email address
-        if self.email:
-            self.email = self.__class__.objects.normalize_email(self.email)
-        # Trim whitespace
-        self.first_name = self.first_name.strip()
-        self.last_name  = self.last_name.strip()
+        self.normalize_fields(kwargs.get('update_fields'))
         super().save(*args, **kwargs)
 
     def get_full_name(self):
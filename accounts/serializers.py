@@ -1,6 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import password_validation
 import logging
@@ -8,15 +15,37 @@ import logging
 from recommendations.models import Genre
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from .tasks import record_last_login
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+EMAIL_IN_USE_ERROR = {"email": [_("This email is already in use.")]}
+
+
+class GenrePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Validates genre ids against Genre.cached_ids() instead of one SELECT per id,
+    falling back to the database for ids newer than the cached set. Returns the
+    ids themselves, which ``preferred_genres.set()`` accepts as-is.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in Genre.cached_ids() and not self.get_queryset().filter(pk=pk).exists():
+            self.fail('does_not_exist', pk_value=data)
+        return pk
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
     Serializer for the User model.
     """
-    preferred_genres = serializers.PrimaryKeyRelatedField(
+    preferred_genres = GenrePrimaryKeyRelatedField(
         many=True,
         queryset=Genre.objects.all(),
         required=False,
@@ -41,20 +70,12 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'first_name': {'label': _("First Name")},
             'last_name': {'label': _("Last Name")},
-            'email': {'label': _("Email Address")},
+            # Uniqueness is enforced by the database (unique=True on a lowercased column)
+            'email': {'label': _("Email Address"), 'validators': []},
         }
 
     def validate_email(self, value):
-        """
-        Ensure email is unique (case-insensitive).
-        """
-        email = value.strip().lower()
-        qs = User.objects.filter(email__iexact=email)
-        if self.instance:
-            qs = qs.exclude(pk=self.instance.pk)
-        if qs.exists():
-            raise ValidationError(_("This email is already in use."))
-        return email
+        return User.objects.normalize_email(value)
 
     def update(self, instance, validated_data):
         """
@@ -64,14 +85,18 @@ class UserSerializer(serializers.ModelSerializer):
         for forbidden in ('is_superuser', 'is_staff'):
             validated_data.pop(forbidden, None)
 
-        # Handle preferred_genres M2M
-        if 'preferred_genres' in validated_data:
-            instance.preferred_genres.set(validated_data.pop('preferred_genres'))
+        try:
+            with transaction.atomic():
+                # Handle preferred_genres M2M
+                if 'preferred_genres' in validated_data:
+                    instance.preferred_genres.set(validated_data.pop('preferred_genres'))
 
-        # Update the rest
-        for attr, val in validated_data.items():
-            setattr(instance, attr, val)
-        instance.save()
+                # Update the rest, writing only the columns that changed
+                for attr, val in validated_data.items():
+                    setattr(instance, attr, val)
+                instance.save(update_fields=[*validated_data, 'updated_at'])
+        except IntegrityError:
+            raise ValidationError(EMAIL_IN_USE_ERROR)
 
         logger.info(f"User {instance.email} updated fields: {list(validated_data.keys())}")
         return instance
@@ -86,7 +111,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         style={'input_type': 'password'},
         label=_("Password"),
     )
-    preferred_genres = serializers.PrimaryKeyRelatedField(
+    preferred_genres = GenrePrimaryKeyRelatedField(
         many=True,
         queryset=Genre.objects.all(),
         required=False,
@@ -100,12 +125,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             'email', 'password',
             'gender', 'preferred_genres',
         )
+        extra_kwargs = {
+            # Uniqueness is enforced by the database (unique=True on a lowercased column)
+            'email': {'validators': []},
+        }
 
     def validate_email(self, value):
-        email = value.strip().lower()
-        if User.objects.filter(email__iexact=email).exists():
-            raise ValidationError(_("This email is already in use."))
-        return email
+        return User.objects.normalize_email(value)
 
     def validate_password(self, value):
         password_validation.validate_password(value, self.instance or User())
@@ -114,23 +140,135 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         genres = validated_data.pop('preferred_genres', [])
         password = validated_data.pop('password')
-        # create_user handles set_password + save
-        user = User.objects.create_user(
-            email=validated_data['email'],
-            password=password,
-            first_name=validated_data.get('first_name',''),
-            last_name=validated_data.get('last_name',''),
-            gender=validated_data.get('gender',''),
-        )
-        if genres:
-            user.preferred_genres.set(genres)
+        try:
+            with transaction.atomic():
+                # create_user handles set_password + save
+                user = User.objects.create_user(
+                    email=validated_data['email'],
+                    password=password,
+                    first_name=validated_data.get('first_name',''),
+                    last_name=validated_data.get('last_name',''),
+                    gender=validated_data.get('gender',''),
+                )
+                if genres:
+                    user.preferred_genres.set(genres)
+        except IntegrityError:
+            raise ValidationError(EMAIL_IN_USE_ERROR)
         return user
 
 
+class UserBulkRegistrationSerializer(serializers.ListSerializer):
+    """
+    List wrapper for bulk imports. Checks every email against the database with
+    a single IN query instead of one lookup per row. Rows whose email already
+    exists, or repeats an earlier row, are dropped from validated_data and
+    listed in ``rejected``; save() inserts the rest with bulk_create.
+    """
+    # Every Argon2 hash holds ~100 MiB (the hasher's default memory_cost), so
+    # the hashes in flight are bounded; callers should bound the rows too
+    HASH_WORKERS = 4
+    BATCH_SIZE = 1000
+
+    def validate(self, attrs):
+        emails = [row['email'] for row in attrs]
+        existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        accepted, seen = [], set()
+        self.rejected = []
+        # Request position of each accepted row, for rows rejected later on
+        self.accepted_indexes = []
+        for index, row in enumerate(attrs):
+            email = row['email']
+            if email in existing:
+                self.rejected.append({"index": index, "email": email, "error": _("This email is already in use.")})
+            elif email in seen:
+                self.rejected.append({"index": index, "email": email, "error": _("Duplicate email in this import.")})
+            else:
+                seen.add(email)
+                accepted.append(row)
+                self.accepted_indexes.append(index)
+        return accepted
+
+    def create(self, validated_data):
+        """
+        Inserts the accepted rows and returns the users actually created.
+        """
+        # Hashing is the expensive part; the hashers release the GIL
+        with ThreadPoolExecutor(max_workers=self.HASH_WORKERS) as pool:
+            hashed = list(pool.map(make_password, (row.pop('password') for row in validated_data)))
+
+        users = [User(password=password, **row) for row, password in zip(validated_data, hashed)]
+        # bulk_create bypasses CustomUser.save()
+        for user in users:
+            user.normalize_fields()
+
+        indexes = self.accepted_indexes
+        while users:
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create(users, batch_size=self.BATCH_SIZE)
+                break
+            except IntegrityError:
+                # An email registered since validation; skip it and retry
+                taken = set(User.objects.filter(
+                    email__in=[user.email for user in users]
+                ).values_list('email', flat=True))
+                if not taken:
+                    raise
+                kept = []
+                for index, user in zip(indexes, users):
+                    if user.email in taken:
+                        self.rejected.append(
+                            {"index": index, "email": user.email, "error": _("This email is already in use.")}
+                        )
+                    else:
+                        # pks from the rolled-back batches were never committed
+                        user.pk = None
+                        kept.append((index, user))
+                indexes, users = [index for index, _user in kept], [user for _index, user in kept]
+        return users
+
+
+class UserBulkImportSerializer(UserRegistrationSerializer):
+    """
+    One row of an admin bulk import. Validates like a registration; with
+    many=True, save() inserts every row through UserBulkRegistrationSerializer.
+    """
+    class Meta(UserRegistrationSerializer.Meta):
+        list_serializer_class = UserBulkRegistrationSerializer
+        fields = (
+            'first_name', 'last_name',
+            'email', 'password',
+            'gender',
+        )
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Issue JWTs that carry email and name claims.
     """
+    # SIMPLE_JWT's UPDATE_LAST_LOGIN is off; last_login is written at most
+    # once per interval per user, from a Celery task.
+    LAST_LOGIN_INTERVAL = 3600
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # Neither the cache nor the broker being down may block a login
+        try:
+            due = cache.add(f"accounts:last_login:{self.user.pk}", True, timeout=self.LAST_LOGIN_INTERVAL)
+        except Exception as e:
+            logger.warning(f"Could not throttle last_login for user {self.user.pk}: {e}")
+            due = True
+        if due:
+            try:
+                record_last_login.apply_async(
+                    (self.user.pk, timezone.now().isoformat()), retry=False
+                )
+            except Exception as e:
+                logger.warning(f"Could not queue last_login for user {self.user.pk}: {e}")
+                update_last_login(None, self.user)
+        return data
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -1,9 +1,12 @@
 import logging
 
 from django.conf import settings
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
 from django_rest_passwordreset.signals import reset_password_token_created
 
+from . import cache as account_cache
+from .models import CustomUser
 from .tasks import send_password_reset_email
 
 logger = logging.getLogger(__name__)
@@ -28,7 +31,7 @@ def password_reset_token_created_handler(sender, reset_password_token, *args, **
     # 2) Queue the email task
     try:
         send_password_reset_email.delay(
-            user_id=user.id,
+            email=user.email,
             subject="Password Reset Request",
             email_template="accounts/password_reset_email.html",
             context={
@@ -39,3 +42,29 @@ def password_reset_token_created_handler(sender, reset_password_token, *args, **
         logger.info(f"Queued password-reset email to {user.email}")
     except Exception as e:
         logger.exception(f"Failed to queue password-reset email for {user.email}: {e}")
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_count_cache(sender, instance, created=True, **kwargs):
+    """
+    Drop the cached total user count when a user is added or removed.
+    Plain profile updates don't change the count, so they're ignored.
+    """
+    if not created:
+        return
+    account_cache.invalidate_user_count_cache()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+@receiver(m2m_changed, sender=CustomUser.preferred_genres.through)
+def invalidate_user_list_cache(sender, **kwargs):
+    """
+    Any change to a user (including their preferred genres) invalidates
+    every cached page of the user list.
+    """
+    action = kwargs.get('action')
+    if action is not None and not action.startswith('post_'):
+        return
+    account_cache.invalidate_user_list_cache()
@@ -1,17 +1,30 @@
 import logging
+from datetime import datetime
 
 from celery import shared_task
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
-from django.contrib.auth import get_user_model
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Email backend kept open for the lifetime of the worker process, so
+# consecutive tasks reuse the same keep-alive connection to Brevo.
+_connection = None
 
-def _send_email(subject, template_name, context, recipient_list):
+
+def _get_connection():
+    global _connection
+    if _connection is None:
+        _connection = get_connection()
+        _connection.open()
+    return _connection
+
+
+def _build_email(subject, template_name, context, recipient_list):
     html_content = render_to_string(template_name, context)
     text_content = strip_tags(html_content)
 
@@ -20,8 +33,14 @@ def _send_email(subject, template_name, context, recipient_list):
         body=text_content,
         from_email=settings.DEFAULT_FROM_EMAIL,
         to=recipient_list,
+        connection=_get_connection(),
     )
     email.attach_alternative(html_content, "text/html")
+    return email
+
+
+def _send_email(subject, template_name, context, recipient_list):
+    email = _build_email(subject, template_name, context, recipient_list)
 
     sent = email.send()
     if sent == 0:
@@ -32,51 +51,69 @@ def _send_email(subject, template_name, context, recipient_list):
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def send_password_reset_email(self, user_id, subject, email_template, context):
+def send_password_reset_email(self, email, subject, email_template, context):
     """
     Celery task: sends a password-reset link email.
+    The caller passes the address, so the task needs no database access.
     Retries up to 3 times on any exception.
     """
-    try:
-        user = User.objects.get(pk=user_id)
-    except User.DoesNotExist:
-        logger.error(f"No such user {user_id}; cannot send reset email.")
-        return
-
-    if not user.email:
-        logger.error(f"User {user_id} has no email; skipping reset email.")
+    if not email:
+        logger.error("No email given; skipping reset email.")
         return
 
     try:
-        _send_email(subject, email_template, context, [user.email])
-        logger.info(f"Password reset email sent to {user.email}.")
+        _send_email(subject, email_template, context, [email])
+        logger.info(f"Password reset email sent to {email}.")
     except Exception as exc:
-        logger.exception(f"Error sending reset email to {user.email}: {exc}")
+        logger.exception(f"Error sending reset email to {email}: {exc}")
         # Retries after delay
         raise self.retry(exc=exc)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def send_password_change_email(self, user_id):
+def send_password_change_email(self, email, user_name):
     """
     Celery task: notifies user their password was changed.
     """
-    try:
-        user = User.objects.get(pk=user_id)
-    except User.DoesNotExist:
-        logger.error(f"No such user {user_id}; cannot send change notification.")
+    if not email:
+        logger.error("No email given; skipping change notification.")
         return
 
-    if not user.email:
-        logger.error(f"User {user_id} has no email; skipping change notification.")
+    subject = "Your password has been changed"
+    context = {"user_name": user_name}
+
+    try:
+        _send_email(subject, "accounts/password_change.html", context, [email])
+        logger.info(f"Password-change notification sent to {email}.")
+    except Exception as exc:
+        logger.exception(f"Error sending change-notif to {email}: {exc}")
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def send_welcome_email(self, email, user_name):
+    """
+    Celery task: greets a newly registered user.
+    """
+    if not email:
+        logger.error("No email given; skipping welcome email.")
         return
 
-    subject = "Your password has been changed"
-    context = {"user_name": user.get_full_name()}
+    subject = "Welcome to FlixFinder"
+    context = {"user_name": user_name}
 
     try:
-        _send_email(subject, "accounts/password_change.html", context, [user.email])
-        logger.info(f"Password-change notification sent to {user.email}.")
+        _send_email(subject, "accounts/welcome_email.html", context, [email])
+        logger.info(f"Welcome email sent to {email}.")
     except Exception as exc:
-        logger.exception(f"Error sending change-notif to {user.email}: {exc}")
+        logger.exception(f"Error sending welcome email to {email}: {exc}")
         raise self.retry(exc=exc)
+
+
+@shared_task
+def record_last_login(user_id, timestamp):
+    """
+    Celery task: stores a (throttled) last_login with a single UPDATE,
+    without loading the user or firing save signals.
+    """
+    User.objects.filter(pk=user_id).update(last_login=datetime.fromisoformat(timestamp))
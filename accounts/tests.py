@@ -1,3 +1,80 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.serializers import UserBulkRegistrationSerializer
+
+User = get_user_model()
+
+PASSWORD = "Xyzzy12345!"
+
+
+def row(email):
+    return {"first_name": "Bulk", "last_name": "User", "email": email, "password": PASSWORD}
+
+
+# Argon2 would make every import take seconds
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class UserBulkImportTests(APITestCase):
+    url = reverse("user-bulk-import")
+
+    def setUp(self):
+        admin = User.objects.create_superuser(email="admin@example.com", password=PASSWORD)
+        self.client.force_authenticate(admin)
+
+    def post(self, rows):
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data
+
+    def assertRejected(self, data, expected):
+        self.assertEqual([(r["index"], r["email"]) for r in data["rejected"]], expected)
+
+    def test_creates_every_row(self):
+        data = self.post([row("a@example.com"), row("b@example.com")])
+
+        self.assertEqual((data["submitted"], data["created"], data["rejected"]), (2, 2, []))
+        user = User.objects.get(email="a@example.com")
+        self.assertTrue(user.check_password(PASSWORD))
+
+    def test_rejects_duplicate_within_request(self):
+        data = self.post([row("a@example.com"), row("b@example.com"), row("A@example.com")])
+
+        self.assertEqual(data["created"], 2)
+        self.assertRejected(data, [(2, "a@example.com")])
+        self.assertEqual(User.objects.filter(email="a@example.com").count(), 1)
+
+    def test_rejects_existing_email(self):
+        User.objects.create_user(email="taken@example.com", password=PASSWORD)
+
+        data = self.post([row("TAKEN@example.com"), row("new@example.com")])
+
+        self.assertEqual(data["created"], 1)
+        self.assertRejected(data, [(0, "taken@example.com")])
+        self.assertTrue(User.objects.filter(email="new@example.com").exists())
+
+    def test_rejects_email_registered_after_validation(self):
+        validate = UserBulkRegistrationSerializer.validate
+
+        def racing_validate(serializer, attrs):
+            accepted = validate(serializer, attrs)
+            # Someone registers between validation and the bulk insert
+            User.objects.create_user(email="racer@example.com", password=PASSWORD)
+            return accepted
+
+        rows = [row("dup@example.com"), row("first@example.com"), row("dup@example.com"),
+                row("racer@example.com"), row("last@example.com")]
+        with mock.patch.object(UserBulkRegistrationSerializer, "validate", racing_validate):
+            data = self.post(rows)
+
+        self.assertEqual((data["submitted"], data["created"]), (5, 3))
+        self.assertRejected(data, [(2, "dup@example.com"), (3, "racer@example.com")])
+        self.assertCountEqual(
+            User.objects.filter(email__endswith="@example.com").exclude(email="admin@example.com")
+                        .values_list("email", flat=True),
+            ["dup@example.com", "first@example.com", "racer@example.com", "last@example.com"],
+        )
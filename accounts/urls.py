@@ -1,11 +1,5 @@
 from django.urls import path
 from . import views
-from django_rest_passwordreset.views import (
-    ResetPasswordConfirm, 
-    ResetPasswordValidateToken,
-)
-
-
 
 
 urlpatterns = [
@@ -30,4 +24,7 @@ urlpatterns = [
 
     # Endpoint to get the total number of registered users
     path('users/total/', views.TotalUserCountView.as_view(), name='user-count'),
+
+    # Admin-only bulk user import
+    path('users/bulk-import/', views.UserBulkImportView.as_view(), name='user-bulk-import'),
 ]
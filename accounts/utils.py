@@ -9,6 +9,35 @@ logger = logging.getLogger(__name__)
 
 class BrevoAPIBackend(BaseEmailBackend):
 
+    API_URL = "https://api.brevo.com/v3/smtp/email"
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently, **kwargs)
+        self.session = None
+
+    def open(self):
+        """
+        Start a keep-alive HTTP session so consecutive messages reuse the same
+        TLS connection. Returns True if a new session was opened.
+        """
+        if self.session is not None:
+            return False
+        self.session = requests.Session()
+        self.session.headers.update({
+            "accept": "application/json",
+            "api-key": settings.BREVO_API_KEY,
+            "content-type": "application/json",
+        })
+        return True
+
+    def close(self):
+        if self.session is None:
+            return
+        try:
+            self.session.close()
+        finally:
+            self.session = None
+
     def send_messages(self, email_messages):
         """
         Send one or more EmailMessage objects and return the number of emails successfully sent.
@@ -21,13 +50,19 @@ class BrevoAPIBackend(BaseEmailBackend):
             return 0
 
         sent_count = 0
+        new_session = self.open()
 
-        for message in email_messages:
-            response = self._send_email_via_brevo(message)
-            if response and response.status_code == 201:  # 201 is for successful email creation
-                sent_count += 1
-            else:
-                logger.error(f"Failed to send email to {message.to}. Status code: {response.status_code if response else 'No Response'}")
+        try:
+            for message in email_messages:
+                response = self._send_email_via_brevo(message)
+                if response and response.status_code == 201:  # 201 is for successful email creation
+                    sent_count += 1
+                else:
+                    logger.error(f"Failed to send email to {message.to}. Status code: {response.status_code if response else 'No Response'}")
+        finally:
+            # Only close sessions we opened; an explicit open() keeps it alive
+            if new_session:
+                self.close()
 
         return sent_count
 
@@ -35,8 +70,6 @@ class BrevoAPIBackend(BaseEmailBackend):
         """
         Helper method to send an individual email message using the Brevo API.
         """
-        api_key = settings.BREVO_API_KEY
-
         # Prepare the email payload
         data = {
             "sender": {"email": message.from_email},
@@ -55,13 +88,8 @@ class BrevoAPIBackend(BaseEmailBackend):
 
         try:
             # Send the email via Brevo API with timeout for better reliability
-            response = requests.post(
-                "https://api.brevo.com/v3/smtp/email",
-                headers={
-                    "accept": "application/json",
-                    "api-key": api_key,
-                    "content-type": "application/json",
-                },
+            response = self.session.post(
+                self.API_URL,
                 json=data,  # Send data as JSON
                 timeout=10  # Timeout of 10 seconds
             )
@@ -1,5 +1,9 @@
 import logging
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
+from django.db.models import Q
 from rest_framework import generics, status, permissions, serializers
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -10,13 +14,19 @@ from drf_spectacular.utils import (
     extend_schema, extend_schema_view, OpenApiResponse, OpenApiExample, inline_serializer
 )
 
+from .cache import (
+    USER_COUNT_CACHE_KEY,
+    invalidate_user_caches,
+    user_list_cache_version,
+)
 from .serializers import (
     UserRegistrationSerializer,
     CustomTokenObtainPairSerializer,
     PasswordChangeSerializer,
     UserSerializer,
+    UserBulkImportSerializer,
 )
-from .tasks import send_password_change_email
+from .tasks import send_password_change_email, send_welcome_email
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -58,6 +68,11 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     queryset = User.objects.all()
 
+    def perform_create(self, serializer):
+        user = serializer.save()
+        # greet the user asynchronously
+        send_welcome_email.delay(email=user.email, user_name=user.get_full_name())
+
 
 @extend_schema(
     summary="Obtain JWT tokens",
@@ -134,14 +149,8 @@ class CustomPasswordResetRequestView(ResetPasswordRequestToken):
     """
     throttle_classes = []  # you can add throttles here
 
-    def get_user_by_email(self, email):
-        email = email.strip()
-        try:
-            return User.objects.get(email__iexact=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError(
-                _("No account found with that email address.")
-            )
+    # The package looks the user up itself, with email__iexact; that is
+    # served by the accounts_email_upper_idx expression index.
 
 
 @extend_schema(
@@ -194,7 +203,7 @@ class PasswordChangeView(generics.UpdateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         # notify via email asynchronously
-        send_password_change_email(user.id)
+        send_password_change_email.delay(email=user.email, user_name=user.get_full_name())
         return Response(
             {"detail": _("Your password has been changed successfully.")},
             status=status.HTTP_200_OK,
@@ -241,8 +250,7 @@ class UserDetailsView(generics.RetrieveUpdateDestroyAPIView):
 
     def delete(self, request, *args, **kwargs):
         # Perform deletion and return 204
-        user = self.get_object()
-        user.delete()
+        request.user.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -253,12 +261,44 @@ class UserDetailsView(generics.RetrieveUpdateDestroyAPIView):
 )
 class UserListView(generics.ListAPIView):
     """
-    GET /api/users/
+    GET /api/users/?page=<n>
     """
-    serializer_class = UserSerializer
-    queryset = User.objects.all()
+    serializer_class = UserSerializer  # documents the row shape; rows are plain dicts
+    # One query per page: columns via values(), genre ids folded in with ARRAY_AGG
+    # (aliased, since an annotation can't reuse the M2M field's name).
+    queryset = User.objects.values(
+        *(f for f in UserSerializer.Meta.fields if f != 'preferred_genres')
+    ).annotate(
+        preferred_genre_ids=ArrayAgg(
+            'preferred_genres',
+            filter=Q(preferred_genres__isnull=False),
+            order_by='preferred_genres__name',
+            default=[],
+        ),
+    ).order_by(*User._meta.ordering)  # Meta.ordering isn't applied to GROUP BY queries
     permission_classes = [permissions.IsAuthenticated]
 
+    # Every user sees the same list, so pages are cached per query string.
+    # accounts.signals bumps the version whenever a user changes.
+    CACHE_TIMEOUT = 30
+
+    def list(self, request, *args, **kwargs):
+        version = user_list_cache_version()
+        cache_key = f"accounts:user_list:{version}:{request.get_full_path()}"
+        data = cache.get(cache_key)
+        if data is None:
+            page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            rows = [self.to_representation(row) for row in page]
+            data = self.get_paginated_response(rows).data
+            cache.set(cache_key, data, timeout=self.CACHE_TIMEOUT)
+        return Response(data)
+
+    @staticmethod
+    def to_representation(row):
+        # Same keys, in the same order, as UserSerializer
+        row['preferred_genres'] = row.pop('preferred_genre_ids')
+        return {field: row[field] for field in UserSerializer.Meta.fields}
+
 
 @extend_schema(
     summary="Total user count",
@@ -276,5 +316,58 @@ class TotalUserCountView(APIView):
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    # Invalidated by accounts.signals whenever a user is created or deleted
+    CACHE_TIMEOUT = 300
+
     def get(self, request, *args, **kwargs):
-        return Response({"total": User.objects.count()})
+        total = cache.get_or_set(USER_COUNT_CACHE_KEY, User.objects.count, timeout=self.CACHE_TIMEOUT)
+        return Response({"total": total})
+
+
+@extend_schema(
+    summary="Bulk import users",
+    description=(
+        "Admin only. Accepts a JSON list of up to 500 users (same fields as registration, "
+        "without preferred_genres). Rows whose email already exists or repeats an "
+        "earlier row are skipped and listed in `rejected`."
+    ),
+    request=UserBulkImportSerializer(many=True),
+    responses={
+        201: inline_serializer(
+            name="UserBulkImportResponse",
+            fields={
+                "submitted": serializers.IntegerField(),
+                "created": serializers.IntegerField(),
+                "rejected": serializers.ListField(child=serializers.DictField()),
+            },
+        ),
+        400: OpenApiResponse(description="Validation error"),
+    },
+    tags=["User Management"],
+)
+class UserBulkImportView(APIView):
+    """
+    POST /api/users/bulk-import/
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    MAX_ROWS = 500
+
+    def post(self, request, *args, **kwargs):
+        serializer = UserBulkImportSerializer(data=request.data, many=True, max_length=self.MAX_ROWS)
+        serializer.is_valid(raise_exception=True)
+        # Existing and repeated emails were already filtered out by the list serializer
+        created = len(serializer.save())
+
+        # bulk_create sends no post_save signals
+        invalidate_user_caches()
+        logger.info(f"Bulk import: {created} of {len(request.data)} users created.")
+
+        return Response(
+            {
+                "submitted": len(request.data),
+                "created": created,
+                "rejected": serializer.rejected,
+            },
+            status=status.HTTP_201_CREATED,
+        )
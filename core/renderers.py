@@ -0,0 +1,22 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson. Types orjson doesn't know natively
+    (Decimal, lazy translation strings, ...) go through DRF's own encoder,
+    so the output matches JSONRenderer.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=self._default, option=self.options)
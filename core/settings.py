@@ -10,16 +10,6 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
-from pathlib import Path
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
-
-import os
 import environ
 from pathlib import Path
 from datetime import timedelta
@@ -34,8 +24,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Initialise environment variables
 env = environ.Env()
-#Locates the .env file
-environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
+# Local development reads a .env file; deployments inject real environment
+# variables and skip the file entirely.
+ENV_FILE = BASE_DIR / '.env'
+if ENV_FILE.is_file():
+    environ.Env.read_env(ENV_FILE)
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = env('SECRET_KEY')
@@ -47,6 +40,10 @@ DEBUG = env('DEBUG', default=False)
 ALLOWED_HOSTS = ['*']
 
 TMDB_API_KEY = env('TMDB_API_KEY')
+# On-disk cache of TMDb GET responses, so re-running the import commands
+# doesn't download everything again
+TMDB_CACHE_PATH = env('TMDB_CACHE_PATH', default=str(BASE_DIR / 'tmdb_cache.sqlite'))
+TMDB_CACHE_EXPIRE_AFTER = timedelta(days=1)
 
 
 # Application definition
@@ -70,10 +67,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compress (JSON) responses; sits above everything that builds the body
+    'django.middleware.gzip.GZipMiddleware',
     'corsheaders.middleware.CorsMiddleware', 
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Sessions, auth and messages are required by django.contrib.admin
+    # (admin.E410/E408/E409). On /api/ they stay cheap: JWT requests carry no
+    # session cookie, so the session is never loaded and request.user stays lazy.
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # DRF's APIView is csrf_exempt, so this only guards the admin
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -85,6 +88,13 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Bound every list endpoint to one page of rows
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -92,6 +102,9 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": False,
+    # Don't issue an UPDATE of custom_user.last_login on every token obtain;
+    # the name/email claims are embedded by CustomTokenObtainPairSerializer,
+    # which also records a throttled last_login through Celery.
     "UPDATE_LAST_LOGIN": False,
 }
 
@@ -171,6 +184,18 @@ WSGI_APPLICATION = 'core.wsgi.application'
 DATABASES = {
     'default': env.db()
 }
+# Shared cache for all web and Celery processes (DB 0 is the Celery broker)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='rediscache://127.0.0.1:6380/1'),
+}
+
+# Reuse connections across requests instead of reconnecting every time;
+# health checks discard connections the server has dropped.
+DATABASES['default']['CONN_MAX_AGE'] = env.int('CONN_MAX_AGE', default=60)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+# Required behind pgbouncer in transaction pooling mode (.iterator() would
+# otherwise open server-side cursors)
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = env.bool('DB_DISABLE_SERVER_SIDE_CURSORS', default=False)
 
 
 
@@ -192,6 +217,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Argon2 (argon2-cffi, already in requirements) is cheaper per request than
+# PBKDF2 at Django's default iteration count. Existing PBKDF2 hashes keep
+# working and are upgraded to Argon2 on the user's next successful login.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -244,6 +280,14 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_ALWAYS_EAGER = False  # Set to True only for local development if needed
 
+CELERY_BEAT_SCHEDULE = {
+    # Genre pages read rankings from a materialized view; keep it close to live
+    'refresh-genre-top-movies': {
+        'task': 'recommendations.tasks.refresh_genre_top_movies',
+        'schedule': timedelta(minutes=10),
+    },
+}
+
 BROKER_TRANSPORT_OPTIONS = {
     "max_connections": 2,
     "socket_keepalive": True,     
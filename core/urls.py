@@ -14,16 +14,32 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from pathlib import Path
+
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
+from django.views.decorators.cache import cache_page
+from django.views.generic import RedirectView
+
+# The OpenAPI schema is generated at build time, after collectstatic:
+#   python manage.py spectacular --format openapi-json --file staticfiles/schema.json
+# and served by WhiteNoise. Without that file, fall back to generating it on
+# request (cached for an hour).
+SCHEMA_FILE = Path(settings.STATIC_ROOT) / "schema.json"
+
+if SCHEMA_FILE.exists():
+    schema_view = RedirectView.as_view(url=f"{settings.STATIC_URL}{SCHEMA_FILE.name}")
+else:
+    schema_view = cache_page(3600)(SpectacularAPIView.as_view())
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
     path('api/', include('recommendations.urls')),
     
-    path('schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('schema/', schema_view, name='schema'),
     path('swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]
@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,19 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Map the recommender's factor matrices at import time. Under gunicorn's
+# --preload this happens once in the master, and the forked workers share
+# the mapped pages instead of each loading its own copy.
+from recommendations.utils import load_model  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# A bad model must only cost the recommendations, which load it lazily on
+# first use, never the whole app
+try:
+    load_model()
+except FileNotFoundError:
+    logger.warning("No recommendation model to preload yet.")
+except Exception:
+    logger.exception("Could not preload the recommendation model.")
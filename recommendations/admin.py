@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.contrib.postgres.aggregates import StringAgg
 from .models import Genre, Movie, Comment, Watchlist, Rating
 
 @admin.register(Genre)
@@ -16,15 +17,23 @@ class MovieAdmin(admin.ModelAdmin):
     filter_horizontal = ['genres']
     readonly_fields = ['average_rating', 'slug']
     ordering = ['-release_date']
-    
+
+    def get_queryset(self, request):
+        # Fold the genre names into the changelist query itself
+        return super().get_queryset(request).annotate(
+            genre_names=StringAgg('genres__name', ', ', order_by='genres__name', default=''),
+        )
+
     def display_genres(self, obj):
-        return ", ".join([genre.name for genre in obj.genres.all()])
+        return obj.genre_names
     display_genres.short_description = 'Genres'
+    display_genres.admin_order_field = 'genre_names'
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ['user', 'movie', 'timestamp']
+    list_select_related = ['user', 'movie']
     search_fields = ['user__email', 'movie__title']
     list_filter = ['timestamp']
 
@@ -32,6 +41,7 @@ class CommentAdmin(admin.ModelAdmin):
 @admin.register(Watchlist)
 class WatchlistAdmin(admin.ModelAdmin):
     list_display = ['user', 'movie', 'watched', 'added_on']
+    list_select_related = ['user', 'movie']
     list_filter = ['watched', 'added_on']
     search_fields = ['user__email', 'movie__title']
 
@@ -39,6 +49,7 @@ class WatchlistAdmin(admin.ModelAdmin):
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
     list_display = ('movie', 'user', 'score', 'created_at', 'updated_at')
+    list_select_related = ('movie', 'user')
     list_filter = ('movie', 'score',)
     search_fields = ('movie__title', 'user__email',)
     readonly_fields = ('created_at', 'updated_at')
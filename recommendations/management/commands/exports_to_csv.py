@@ -78,11 +78,9 @@ class Command(BaseCommand):
                 cols.append(f.attname)          # "user_id" instead of "user"
             else:
                 cols.append(f.name)
-        with open(path, 'w', newline='', encoding='utf-8') as csvf:
+        # 1 MiB buffer: far fewer write() syscalls than the 8 KiB default
+        with open(path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvf:
             writer = csv.writer(csvf)
             writer.writerow(cols)
-            for obj in model.objects.all():
-                row = []
-                for col in cols:
-                    row.append(getattr(obj, col))
-                writer.writerow(row)
+            # Stream plain tuples in chunks instead of building model instances
+            writer.writerows(model.objects.values_list(*cols).iterator(chunk_size=2000))
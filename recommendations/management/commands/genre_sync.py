@@ -1,15 +1,21 @@
-import time
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.utils.text import slugify
 
 from recommendations.models import Genre, Movie
+from recommendations.tmdb_client import tmdb_session
 
 logger = logging.getLogger(__name__)
 
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+
 
 class Command(BaseCommand):
     help = """
@@ -17,14 +23,27 @@ class Command(BaseCommand):
     
     1) Pull /genre/movie/list to seed your Genre table.
     2) For each Movie with a tmdb_id, GET /movie/{tmdb_id} and assign its genres.
+       Requests run on a thread pool in chunks; links are written per chunk.
+
+    Every request goes through tmdb_session(): responses are cached on disk,
+    so reruns skip the round-trips, and 429s/5xx are retried honouring
+    Retry-After.
     """
 
+    CHUNK_SIZE = 200
+
     def add_arguments(self, parser):
         parser.add_argument(
             "--sleep",
             type=float,
             default=0.25,
-            help="Seconds to sleep between TMDB requests (avoid rate‐limit).",
+            help="Seconds each worker sleeps after an uncached TMDB request (avoid rate‐limit).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Number of worker threads, i.e. TMDB requests in flight at once.",
         )
 
     def handle(self, *args, **options):
@@ -35,59 +54,96 @@ class Command(BaseCommand):
             ))
             return
 
-        session = requests.Session()
-        base = "https://api.themoviedb.org/3"
+        # Cached on disk, so reruns skip the round-trips
+        session = tmdb_session()
+        base = TMDB_BASE_URL
         params = {"api_key": api_key, "language": "en-US"}
 
         # 1) Fetch all TMDB genres
         self.stdout.write("🔄 Fetching master genre list from TMDB…")
-        resp = session.get(f"{base}/genre/movie/list", params=params)
+        resp = session.get(f"{base}/genre/movie/list", params=params, timeout=10)
         resp.raise_for_status()
         tmdb_genres = resp.json().get("genres", [])
         self.stdout.write(f"   • {len(tmdb_genres)} genres found")
 
-        # Upsert into our Genre table
-        for g in tmdb_genres:
-            name = g["name"]
-            slug = slugify(name)
-            obj, created = Genre.objects.update_or_create(
-                name__iexact=name,
-                defaults={"name": name, "slug": slug},
-            )
-            if created:
-                logger.info(f"Created genre '{name}'")
-            else:
-                logger.debug(f"Updated genre '{name}'")
+        # Upsert into our Genre table in one INSERT … ON CONFLICT (name)
+        Genre.objects.bulk_create(
+            [Genre(name=g["name"], slug=slugify(g["name"])) for g in tmdb_genres],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["slug"],
+        )
+        # bulk_create sends no post_save, so drop the cached genre ids ourselves
+        cache.delete(Genre.IDS_CACHE_KEY)
+        logger.info(f"Upserted {len(tmdb_genres)} genres")
         self.stdout.write(self.style.SUCCESS("✅ Genres table synced."))
 
-        # 2) Walk through every Movie with a tmdb_id
-        qs = Movie.objects.filter(tmdb_id__isnull=False)
-        total = qs.count()
-        self.stdout.write(f"🎥 Syncing genres for {total} movies…")
-
-        for idx, movie in enumerate(qs, start=1):
-            tmdb_id = movie.tmdb_id
-            try:
-                r = session.get(f"{base}/movie/{tmdb_id}", params=params, timeout=10)
-                r.raise_for_status()
-                data = r.json()
-            except requests.RequestException as e:
-                logger.error(f"[{idx}/{total}] TMDB fetch failed for tmdb_id={tmdb_id}: {e}")
-                continue
-
-            genre_list = data.get("genres", [])
-            names = [g["name"] for g in genre_list]
-            # Look up our Genre objects
-            genres = list(Genre.objects.filter(name__in=names))
-            if not genres and names:
-                logger.warning(f"[{idx}/{total}] No local genres found for {names} on movie {movie.pk}")
-
-            # Assign M2M
-            with transaction.atomic():
-                movie.genres.set(genres)
-
-            self.stdout.write(f"[{idx}/{total}] {movie.title!r}: linked {len(genres)} genres")
-            time.sleep(options["sleep"])
+        # 2) Fetch every distinct tmdb_id concurrently, chunk by chunk
+        pks_by_tmdb = {}
+        for pk, tmdb_id in Movie.objects.filter(tmdb_id__isnull=False).values_list("pk", "tmdb_id"):
+            pks_by_tmdb.setdefault(tmdb_id, []).append(pk)
+        tmdb_ids = list(pks_by_tmdb)
+        total = len(tmdb_ids)
+        self.stdout.write(f"🎥 Syncing genres for {total} TMDB titles…")
+
+        # The Genre table is small and fixed after step 1; load it once
+        genre_by_name = {g.name: g for g in Genre.objects.all()}
+
+        through = Movie.genres.through
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            for start in range(0, total, self.CHUNK_SIZE):
+                chunk = tmdb_ids[start:start + self.CHUNK_SIZE]
+                futures = [
+                    executor.submit(self.fetch_genre_names, session, tmdb_id, params, options["sleep"])
+                    for tmdb_id in chunk
+                ]
+                fetched = {}
+                for tmdb_id, future in zip(chunk, futures):
+                    # An unexpected error fails this title only, never the run
+                    if future.exception() is not None:
+                        logger.error(f"TMDB fetch failed for tmdb_id={tmdb_id}: {future.exception()!r}")
+                    elif (names := future.result()) is not None:
+                        fetched[tmdb_id] = names
+
+                self.write_chunk(fetched, pks_by_tmdb, genre_by_name, through)
+                done = start + len(chunk)
+                self.stdout.write(f"[{done}/{total}] synced {len(fetched)} titles ({len(chunk) - len(fetched)} failed)")
 
         self.stdout.write(self.style.SUCCESS("✅ All movie→genre links synchronized."))
 
+    def write_chunk(self, fetched, pks_by_tmdb, genre_by_name, through):
+        """
+        Replace the genre links of every movie whose tmdb_id was fetched.
+        """
+        movie_pks, links = [], []
+        for tmdb_id, names in fetched.items():
+            missing = [name for name in names if name not in genre_by_name]
+            if missing:
+                logger.warning(f"No local genres found for {missing} on tmdb_id={tmdb_id}")
+            for pk in pks_by_tmdb[tmdb_id]:
+                movie_pks.append(pk)
+                links.extend(
+                    through(movie_id=pk, genre_id=genre_by_name[name].pk)
+                    for name in names if name in genre_by_name
+                )
+
+        with transaction.atomic():
+            through.objects.filter(movie_id__in=movie_pks).delete()
+            through.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+    def fetch_genre_names(self, session, tmdb_id, params, sleep):
+        """
+        Return the genre names of one title, or None when the request failed.
+        Runs on a worker thread; the shared session is safe to use across threads.
+        """
+        try:
+            r = session.get(f"{TMDB_BASE_URL}/movie/{tmdb_id}", params=params, timeout=10)
+            r.raise_for_status()
+            data = r.json()
+        except (requests.RequestException, ValueError) as e:  # ValueError: body isn't JSON
+            logger.error(f"TMDB fetch failed for tmdb_id={tmdb_id}: {e}")
+            return None
+        # Only real round-trips count against TMDB's rate limit
+        if not getattr(r, "from_cache", False):
+            time.sleep(sleep)
+        return [g["name"] for g in data.get("genres", [])]
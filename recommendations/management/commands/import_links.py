@@ -25,8 +25,7 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"Cannot find links.csv at {links_file}"))
             return
 
-        created_count = 0
-        skipped_count = 0
+        movies = []
 
         self.stdout.write("Reading links.csv …")
         with open(links_file, newline="", encoding="utf-8") as f:
@@ -47,29 +46,22 @@ class Command(BaseCommand):
                 except ValueError:
                     tmdb = None
 
-                # Try to get or create; never duplicates
-                try:
-                    with transaction.atomic():
-                        movie, created = Movie.objects.get_or_create(
-                            movielens_id=ml_id,
-                            defaults={
-                                "imdb_id": imdb,
-                                "tmdb_id": tmdb,
-                            }
-                        )
-                except Exception as e:
-                    self.stderr.write(f"  ❌ Error upserting movielens_id={ml_id}: {e}")
-                    continue
+                # bulk_create skips Movie.save(), so give each row a unique
+                # placeholder slug; it's replaced once the title is imported.
+                movies.append(Movie(
+                    movielens_id=str(ml_id),
+                    imdb_id=imdb,
+                    tmdb_id=tmdb,
+                    slug=f"ml-{ml_id}",
+                ))
 
-                if created:
-                    self.stdout.write(
-                        f"  ✅ Created Movie(id={movie.id}) "
-                        f"movielens_id={ml_id}, imdb_id={imdb}, tmdb_id={tmdb}"
-                    )
-                    created_count += 1
-                else:
-                    self.stdout.write(f"  ⚪ Skipped existing Movie(id={movie.id}) movielens_id={ml_id}")
-                    skipped_count += 1
+        ids = [movie.movielens_id for movie in movies]
+        with transaction.atomic():
+            existing = Movie.objects.filter(movielens_id__in=ids).count()
+            # Existing movielens_ids are skipped by the unique constraint
+            Movie.objects.bulk_create(movies, batch_size=1000, ignore_conflicts=True)
+            created_count = Movie.objects.filter(movielens_id__in=ids).count() - existing
+        skipped_count = len(movies) - created_count
 
         self.stdout.write(self.style.SUCCESS(
             f"Finished: {created_count} created, {skipped_count} skipped."
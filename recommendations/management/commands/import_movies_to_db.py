@@ -1,10 +1,9 @@
-import csv
 import os
 import logging
-from datetime import datetime
 
+import pandas as pd
 from django.core.management.base import BaseCommand
-from django.db import transaction, IntegrityError
+from django.db import transaction
 from django.utils.text import slugify
 
 from recommendations.models import Movie
@@ -18,6 +17,12 @@ class Command(BaseCommand):
         "skipping those released before 2000 or missing a trailer_url."
     )
 
+    TOP_N = 1000
+    COLUMNS = [
+        "movielens_id", "imdb_id", "tmdb_id", "title", "overview", "release_date",
+        "cast", "language", "poster_url", "trailer_url", "average_rating",
+    ]
+
     def add_arguments(self, parser):
         parser.add_argument(
             "--path",
@@ -34,58 +39,36 @@ class Command(BaseCommand):
         self.stdout.write(f"📖 Reading {csv_path}…")
         logger.info("Starting import_top_movies command")
 
-        total_rows = 0
-        skipped_date = skipped_year = skipped_trailer = 0
-        movies = []
-
-        # 1) Read & filter
-        with open(csv_path, newline="", encoding="utf-8") as f:
-            delimiter = "\t" if "\t" in f.read(1024) else ","
-            f.seek(0)
-            reader = csv.DictReader(f, delimiter=delimiter)
-            for row in reader:
-                total_rows += 1
-
-                # parse release_date
-                raw_date = row.get("release_date", "").strip()
-                try:
-                    dt = datetime.strptime(raw_date, "%d/%m/%Y").date()
-                except Exception:
-                    skipped_date += 1
-                    logger.debug(f"Row {total_rows}: invalid date '{raw_date}', skipping")
-                    continue
-
-                if dt.year < 2000:
-                    skipped_year += 1
-                    logger.debug(f"Row {total_rows}: year {dt.year}<2000, skipping")
-                    continue
-
-                trailer = row.get("trailer_url", "").strip()
-                if not trailer:
-                    skipped_trailer += 1
-                    logger.debug(f"Row {total_rows}: missing trailer_url, skipping")
-                    continue
-
-                # parse average_rating
-                try:
-                    avg = float(row.get("average_rating", 0))
-                except ValueError:
-                    avg = 0.0
-                    logger.debug(f"Row {total_rows}: invalid average_rating, defaulted to 0.0")
-
-                movies.append({
-                    "movielens_id":   row.get("movielens_id") or None,
-                    "imdb_id":        row.get("imdb_id") or None,
-                    "tmdb_id":        int(row["tmdb_id"]) if row.get("tmdb_id") else None,
-                    "title":          row.get("title","").strip(),
-                    "overview":       row.get("overview","").strip(),
-                    "release_date":   dt,
-                    "cast":           self.parse_cast(row.get("cast","")),
-                    "language":       row.get("language","").strip(),
-                    "poster_url":     row.get("poster_url") or None,
-                    "trailer_url":    trailer,
-                    "average_rating": avg,
-                })
+        # 1) Read & filter; every column is parsed and filtered column-wise
+        #    in pandas rather than field by field in Python
+        with open(csv_path, "rb") as raw:
+            # Sniff the delimiter from the buffered bytes without consuming them
+            delimiter = "\t" if b"\t" in raw.peek(1024)[:1024] else ","
+            df = pd.read_csv(
+                raw,
+                sep=delimiter,
+                dtype=str,
+                keep_default_na=False,
+                encoding="utf-8",
+            ).reindex(columns=self.COLUMNS, fill_value="")
+
+        total_rows = len(df)
+        for col in self.COLUMNS:
+            df[col] = df[col].str.strip()
+
+        dates = pd.to_datetime(df["release_date"], format="%d/%m/%Y", errors="coerce")
+        bad_date = dates.isna()
+        old = ~bad_date & (dates.dt.year < 2000)
+        no_trailer = ~bad_date & ~old & (df["trailer_url"] == "")
+        skipped_date, skipped_year, skipped_trailer = int(bad_date.sum()), int(old.sum()), int(no_trailer.sum())
+
+        keep = ~(bad_date | old | no_trailer)
+        df = df[keep].assign(
+            release_date=dates[keep].dt.date,
+            average_rating=pd.to_numeric(df["average_rating"][keep], errors="coerce").fillna(0.0),
+            tmdb_id=pd.to_numeric(df["tmdb_id"][keep], errors="coerce").astype("Int64"),
+        )
+        passed = len(df)
 
         self.stdout.write(f"🔢 Rows read: {total_rows}")
         self.stdout.write(
@@ -93,55 +76,63 @@ class Command(BaseCommand):
             f"   • Skipped by year <2000: {skipped_year}\n"
             f"   • Skipped by missing trailer: {skipped_trailer}\n"
         )
-        passed = len(movies)
         if not passed:
             self.stdout.write(self.style.WARNING("⚠️ No movies passed the filters."))
             logger.warning("No rows passed the filter criteria—aborting import.")
             return
 
-        # 2) sort & limit
-        movies.sort(key=lambda m: m["average_rating"], reverse=True)
-        to_import = movies[:1000]
+        # 2) best first; keep="first" lets earlier rows win ties
+        top = df.nlargest(self.TOP_N, "average_rating", keep="first")
+        to_import = [
+            {
+                "movielens_id":   row.movielens_id or None,
+                "imdb_id":        row.imdb_id or None,
+                "tmdb_id":        None if pd.isna(row.tmdb_id) else int(row.tmdb_id),
+                "title":          row.title,
+                "overview":       row.overview,
+                "release_date":   row.release_date,
+                "cast":           self.parse_cast(row.cast),
+                "language":       row.language,
+                "poster_url":     row.poster_url or None,
+                "trailer_url":    row.trailer_url,
+                "average_rating": float(row.average_rating),
+            }
+            for row in top.itertuples(index=False)
+        ]
         self.stdout.write(f"🎯 {len(to_import)} movies selected for import (top by rating)")
 
         # 3) upsert into DB
-        imported = created = updated = collisions = 0
-        for idx, data in enumerate(to_import, start=1):
-            mlid = str(data.pop("movielens_id"))
-            base_slug = slugify(data["title"])
-
-            with transaction.atomic():
-                try:
-                    obj, was_created = Movie.objects.update_or_create(
-                        movielens_id=mlid,
-                        defaults=data
-                    )
-                except IntegrityError:
-                    # fallback if slug collision prevented update_or_create
-                    obj, was_created = Movie.objects.get_or_create(
-                        movielens_id=mlid,
-                        defaults=data
-                    )
-                # enforce unique slug
-                slug = obj.slug or base_slug
-                if Movie.objects.filter(slug=slug).exclude(pk=obj.pk).exists():
-                    new_slug = f"{base_slug}-{mlid}"
-                    obj.slug = new_slug
-                    obj.save(update_fields=["slug"])
-                    collisions += 1
-                    logger.warning(f"Slug collision for '{slug}', changed to '{new_slug}'")
-
-            imported += 1
-            if was_created:
-                created += 1
-                logger.debug(f"[{idx}/{len(to_import)}] Created Movie(id={obj.pk}, mlid={mlid})")
-            else:
-                updated += 1
-                logger.debug(f"[{idx}/{len(to_import)}] Updated Movie(id={obj.pk}, mlid={mlid})")
-
-            # progress every 100
-            if imported % 100 == 0:
-                self.stdout.write(f"  • {imported}/{len(to_import)} processed…")
+        # One row per movielens_id (the list is sorted, so the best-rated wins);
+        # ON CONFLICT can't touch the same row twice in one statement.
+        rows, skipped_id = {}, 0
+        for data in to_import:
+            mlid = data.pop("movielens_id")
+            if not mlid:
+                skipped_id += 1
+                continue
+            rows.setdefault(str(mlid), data)
+
+        slugs, collisions = self.resolve_slugs(rows)
+        existing = set(Movie.objects.filter(movielens_id__in=rows).values_list("movielens_id", flat=True))
+        objs = [Movie(movielens_id=mlid, slug=slugs[mlid], **data) for mlid, data in rows.items()]
+
+        with transaction.atomic():
+            Movie.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=["movielens_id"],
+                update_fields=[
+                    "imdb_id", "tmdb_id", "title", "overview", "release_date", "cast",
+                    "language", "poster_url", "trailer_url", "average_rating", "slug",
+                ],
+                batch_size=500,
+            )
+
+        imported = len(objs)
+        updated = len(existing)
+        created = imported - updated
+        if skipped_id:
+            self.stdout.write(self.style.WARNING(f"⚠️ Skipped {skipped_id} rows without a movielens_id"))
 
         # 4) summary
         self.stdout.write(self.style.SUCCESS(
@@ -153,6 +144,28 @@ class Command(BaseCommand):
             f"({created} created, {updated} updated, {collisions} collisions)"
         )
 
+    def resolve_slugs(self, rows):
+        """
+        bulk_create skips Movie.save(), so slugs are decided here with a single
+        query. A movie keeps its title's slug unless another movie (in the DB or
+        earlier in this batch) already has it, in which case the movielens_id
+        is appended. Returns ({movielens_id: slug}, number of collisions).
+        """
+        base_slugs = {mlid: slugify(data["title"]) or f"movie-{mlid}" for mlid, data in rows.items()}
+        candidates = set(base_slugs.values()) | {f"{slug}-{mlid}" for mlid, slug in base_slugs.items()}
+        slug_owner = dict(Movie.objects.filter(slug__in=candidates).values_list("slug", "movielens_id"))
+
+        slugs, collisions = {}, 0
+        for mlid, slug in base_slugs.items():
+            if slug_owner.get(slug, mlid) != mlid:
+                new_slug = f"{slug}-{mlid}"
+                collisions += 1
+                logger.warning(f"Slug collision for '{slug}', changed to '{new_slug}'")
+                slug = new_slug
+            slug_owner[slug] = mlid
+            slugs[mlid] = slug
+        return slugs, collisions
+
     def parse_cast(self, raw):
         raw = raw.strip()
         if not raw:
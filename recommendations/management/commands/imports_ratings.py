@@ -1,14 +1,16 @@
 
 import csv
+import io
 import os
 from datetime import datetime, timezone as dt_timezone
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from django.utils import timezone
+from django.db import connection, transaction
 
 from django.contrib.auth import get_user_model
-from recommendations.models import Movie, Rating
+from django.contrib.auth.hashers import make_password
+from accounts.cache import invalidate_user_caches
+from recommendations.models import GenreTopMovie, Movie, Rating
 
 User = get_user_model()
 
@@ -32,9 +34,14 @@ class Command(BaseCommand):
             return self.stderr.write(self.style.ERROR(f"File not found: {ratings_file}"))
 
         self.stdout.write(f"Reading ratings from {ratings_file} …")
-        user_cache = {}
-        imported = 0
         skipped = 0
+        # (uid, movie pk) -> (score, created_at); later rows win, as update_or_create did
+        ratings = {}
+
+        # 1️⃣ Map movielens_id -> movie pk once; rows are resolved in memory
+        movie_map = dict(
+            Movie.objects.filter(movielens_id__isnull=False).values_list("movielens_id", "id")
+        )
 
         with open(ratings_file, newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
@@ -48,47 +55,77 @@ class Command(BaseCommand):
                     skipped += 1
                     continue
 
-                # 1️⃣ Ensure user exists
-                if uid not in user_cache:
-                    email = f"ml_{uid}@movielens.local"
-                    full_name = f"MovieLens User {uid}"
-                    user, created = User.objects.get_or_create(
-                        email=email,
-                        defaults={
-                            "first_name": full_name,
-                            "last_name": "",
-                            "is_active": True,
-                        },
-                    )
-                    if created:
-                        user.set_unusable_password()
-                        user.save()
-                    user_cache[uid] = user
-                user = user_cache[uid]
-
-                # 2️⃣ Look up movie by movielens_id
-                try:
-                    movie = Movie.objects.get(movielens_id=str(mid))
-                except Movie.DoesNotExist:
+                movie_id = movie_map.get(str(mid))
+                if movie_id is None:
                     skipped += 1
                     continue
+                ratings[(uid, movie_id)] = (score, datetime.fromtimestamp(ts, tz=dt_timezone.utc))
+
+        with transaction.atomic():
+            # 2️⃣ Ensure users exist: one SELECT, one bulk INSERT for the missing ones
+            emails = {uid: f"ml_{uid}@movielens.local" for uid, _ in ratings}
+            user_map = dict(User.objects.filter(email__in=emails.values()).values_list("email", "id"))
+            new_users = [
+                User(
+                    email=email,
+                    password=make_password(None),  # unusable
+                    first_name=f"MovieLens User {uid}",
+                    last_name="",
+                    is_active=True,
+                )
+                for uid, email in emails.items() if email not in user_map
+            ]
+            User.objects.bulk_create(new_users, batch_size=1000, ignore_conflicts=True)
+            if new_users:
+                user_map = dict(User.objects.filter(email__in=emails.values()).values_list("email", "id"))
+
+            # 3️⃣ Create or update ratings in bulk
+            rows = [
+                (user_map[emails[uid]], movie_id, score, created_at)
+                for (uid, movie_id), (score, created_at) in ratings.items()
+            ]
+            self.copy_ratings(rows)
 
-                # 3️⃣ Create or update rating
-                created_at = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
-                with transaction.atomic():
-                    Rating.objects.update_or_create(
-                        user=user,
-                        movie=movie,
-                        defaults={
-                            "score": score,
-                            "created_at": created_at,
-                            "updated_at": created_at,
-                        },
-                    )
-                imported += 1
+            # 4️⃣ Bulk writes send no post_save, so refresh the affected averages here
+            Movie.refresh_average_ratings({movie_id for _, movie_id in ratings})
+
+        # bulk_create sent no post_save, so drop the cached user count and list
+        if new_users:
+            invalidate_user_caches()
+
+        # The new averages reorder the genre pages
+        GenreTopMovie.refresh()
+
+        imported = len(rows)
 
         self.stdout.write(self.style.SUCCESS(
-            f"Imported {imported} ratings; skipped {skipped} rows."
+            f"Imported {imported} ratings for {len(new_users)} new users; skipped {skipped} rows."
         ))
 
-        self.stdout.write(self.style.SUCCESS("✅ import_ratings complete!"))    
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS("✅ import_ratings complete!"))
+
+    def copy_ratings(self, rows):
+        """
+        COPY the rows into a temp table, then upsert them into the ratings
+        table with a single INSERT … ON CONFLICT. Writing the columns directly
+        keeps the MovieLens timestamps, since auto_now(_add) only applies to
+        ORM saves. PostgreSQL only, like the rest of the schema.
+        """
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        buf.seek(0)
+
+        table = connection.ops.quote_name(Rating._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE import_ratings "
+                "(user_id bigint, movie_id bigint, score numeric(3, 1), ts timestamptz) "
+                "ON COMMIT DROP"
+            )
+            cursor.copy_expert("COPY import_ratings FROM STDIN WITH (FORMAT csv)", buf)
+            cursor.execute(
+                f"INSERT INTO {table} (user_id, movie_id, score, created_at, updated_at) "
+                "SELECT user_id, movie_id, score, ts, ts FROM import_ratings "
+                "ON CONFLICT (user_id, movie_id) DO UPDATE "
+                "SET score = EXCLUDED.score, updated_at = EXCLUDED.updated_at"
+            )
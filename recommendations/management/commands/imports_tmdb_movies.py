@@ -1,7 +1,8 @@
 # recommendations/management/commands/enrich_tmdb_via_api.py
 
-import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from itertools import islice
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.conf import settings
@@ -12,14 +13,67 @@ from recommendations.tmdb_client import TMDbClient  # your wrapper around TMDb R
 class Command(BaseCommand):
     help = "Enrich existing Movie records via TMDb API (skips movies already up-to-date)."
 
+    ENRICH_FIELDS = [
+        "title", "overview", "release_date", "language",
+        "poster_url", "average_rating", "trailer_url",
+    ]
+    CHUNK_SIZE = 200
+
     def parse_date(self, date_str):
         """Parse YYYY-MM-DD or return None."""
         try:
-            return datetime.strptime(date_str, "%Y-%m-%d").date()
+            return date.fromisoformat(date_str)
         except (ValueError, TypeError):
             return None
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Number of TMDb requests in flight at once.",
+        )
+
+    def tmdb_values(self, details):
+        """Map a TMDb details payload onto Movie field values."""
+        poster = details.get("poster_path")
+        return {
+            "title": details.get("title"),
+            "overview": details.get("overview"),
+            "release_date": self.parse_date(details.get("release_date")),
+            "language": details.get("original_language"),
+            "poster_url": f"https://image.tmdb.org/t/p/w500{poster}" if poster else None,
+            "average_rating": details.get("vote_average"),
+            "genres": {g["name"] for g in details.get("genres", []) if "name" in g},
+        }
+
+    def is_current(self, movie, new, current_names):
+        return (
+            movie["title"] == new["title"] and
+            movie["overview"] == new["overview"] and
+            movie["release_date"] == new["release_date"] and
+            movie["language"] == new["language"] and
+            movie["poster_url"] == new["poster_url"] and
+            float(movie["average_rating"]) == float(new["average_rating"] or 0) and
+            current_names == new["genres"] and
+            movie["trailer_url"]  # assume if trailer_url exists it's up-to-date
+        )
+
+    def fetch_one(self, client, movie, current_names):
+        """
+        Runs on a worker thread: only talks to TMDb, never to the database.
+        Videos are fetched only for movies that actually need updating.
+        """
+        details = client.get_movie_details_by_tmdb_id(movie["tmdb_id"])
+        if not details:
+            return movie, None, False, None
+        new = self.tmdb_values(details)
+        if self.is_current(movie, new, current_names):
+            return movie, new, False, None
+        return movie, new, True, client.get_movie_videos(movie["tmdb_id"])
+
     def handle(self, *args, **options):
+        # The client's token bucket keeps all workers within TMDb's rate limit
         client = TMDbClient(settings.TMDB_API_KEY)
 
         # Preload TMDb genres once
@@ -29,91 +83,112 @@ class Command(BaseCommand):
             genre_obj, _ = Genre.objects.get_or_create(name=name)
             genre_map[name] = genre_obj
 
-        qs = Movie.objects.filter(tmdb_id__isnull=False)
-        total = qs.count()
+        total = Movie.objects.filter(tmdb_id__isnull=False).count()
         self.stdout.write(f"Found {total} movies with tmdb_id to enrich…\n")
         updated = 0
 
-        for idx, movie in enumerate(qs, start=1):
-            tmdb_id = movie.tmdb_id
-            if not tmdb_id:
-                continue
-
-            details = client.get_movie_details_by_tmdb_id(tmdb_id)
-            if not details:
-                self.stdout.write(self.style.WARNING(f"[{idx}/{total}] No details for TMDB {tmdb_id}, skipping."))
-                continue
-
-            # Gather TMDb data
-            new_title = details.get("title")
-            new_overview = details.get("overview")
-            new_release = self.parse_date(details.get("release_date"))
-            new_lang = details.get("original_language")
-            new_poster = details.get("poster_path")
-            new_poster_url = f"https://image.tmdb.org/t/p/w500{new_poster}" if new_poster else None
-            new_avg = details.get("vote_average")
-
-            # Prepare genre sets
-            tmdb_genre_list = details.get("genres", [])
-            tmdb_names = {g["name"] for g in tmdb_genre_list if "name" in g}
-            current_names = set(movie.genres.values_list("name", flat=True))
-
-            # Check if everything is already current
-            if (
-                movie.title == new_title and
-                movie.overview == new_overview and
-                movie.release_date == new_release and
-                movie.language == new_lang and
-                movie.poster_url == new_poster_url and
-                float(movie.average_rating) == float(new_avg or 0) and
-                current_names == tmdb_names and
-                movie.trailer_url  # assume if trailer_url exists it's up-to-date
-            ):
-                self.stdout.write(f"[{idx}/{total}] Movie ID {movie.pk} already enriched; skipping.")
-                continue
-
-            # Begin update
-            with transaction.atomic():
-                fields = []
-                if new_title and movie.title != new_title:
-                    movie.title = new_title; fields.append("title")
-                if new_overview is not None and movie.overview != new_overview:
-                    movie.overview = new_overview; fields.append("overview")
-                if new_release and movie.release_date != new_release:
-                    movie.release_date = new_release; fields.append("release_date")
-                if new_lang and movie.language != new_lang:
-                    movie.language = new_lang; fields.append("language")
-                if movie.poster_url != new_poster_url:
-                    movie.poster_url = new_poster_url; fields.append("poster_url")
-                if new_avg is not None and float(movie.average_rating) != float(new_avg):
-                    movie.average_rating = new_avg; fields.append("average_rating")
-
-                if fields:
-                    movie.save(update_fields=fields)
-
-                # Sync genres
-                movie.genres.clear()
-                for name in tmdb_names:
-                    movie.genres.add(genre_map[name])
-
-                # Fetch trailers
-                videos = client.get_movie_videos(tmdb_id)
-                trailer_url = None
-                if videos:
-                    trailers = [v for v in videos["results"] if v.get("type")=="Trailer" and v.get("site")=="YouTube"]
-                    if trailers:
-                        trailer_url = f"https://www.youtube.com/watch?v={trailers[0]['key']}"
-
-                if trailer_url and trailer_url != movie.trailer_url:
-                    movie.trailer_url = trailer_url
-                    movie.save(update_fields=["trailer_url"])
-
-                updated += 1
-
-            self.stdout.write(f"[{idx}/{total}] Updated Movie pk={movie.pk}")
-
-            # Rate-limit
-            time.sleep(0.25)
+        # Stream plain rows holding only the compared columns, in chunks, so
+        # memory stays bounded; genre names are loaded with one query per chunk.
+        movies = (
+            Movie.objects.filter(tmdb_id__isnull=False)
+            .values("id", "tmdb_id", *self.ENRICH_FIELDS)
+            .iterator(chunk_size=self.CHUNK_SIZE)
+        )
+        through = Movie.genres.through
+
+        # HTTP calls overlap on the pool; results come back in order and all
+        # database writes stay on this thread.
+        idx = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while chunk := list(islice(movies, self.CHUNK_SIZE)):
+                current_genres = {movie["id"]: set() for movie in chunk}
+                for movie_id, name in (
+                    through.objects.filter(movie_id__in=current_genres)
+                    .values_list("movie_id", "genre__name")
+                ):
+                    current_genres[movie_id].add(name)
+                futures = [
+                    executor.submit(self.fetch_one, client, movie, current_genres[movie["id"]])
+                    for movie in chunk
+                ]
+
+                # Movies with changed columns, and the union of those columns
+                dirty_movies, dirty_fields = [], set()
+                # movie pk -> genre pks, only for movies whose genres changed
+                genre_links = {}
+
+                for future in futures:
+                    idx += 1
+                    movie, new, stale, videos = future.result()
+                    movie_pk, tmdb_id = movie["id"], movie["tmdb_id"]
+
+                    if new is None:
+                        self.stdout.write(self.style.WARNING(f"[{idx}/{total}] No details for TMDB {tmdb_id}, skipping."))
+                        continue
+
+                    if not stale:
+                        self.stdout.write(f"[{idx}/{total}] Movie ID {movie_pk} already enriched; skipping.")
+                        continue
+
+                    # Only mutate in memory; the chunk is written in bulk below
+                    fields = set()
+                    if new["title"] and movie["title"] != new["title"]:
+                        movie["title"] = new["title"]; fields.add("title")
+                    if new["overview"] is not None and movie["overview"] != new["overview"]:
+                        movie["overview"] = new["overview"]; fields.add("overview")
+                    if new["release_date"] and movie["release_date"] != new["release_date"]:
+                        movie["release_date"] = new["release_date"]; fields.add("release_date")
+                    if new["language"] and movie["language"] != new["language"]:
+                        movie["language"] = new["language"]; fields.add("language")
+                    if movie["poster_url"] != new["poster_url"]:
+                        movie["poster_url"] = new["poster_url"]; fields.add("poster_url")
+                    if new["average_rating"] is not None and float(movie["average_rating"]) != float(new["average_rating"]):
+                        movie["average_rating"] = new["average_rating"]; fields.add("average_rating")
+
+                    # Pick the trailer
+                    trailer_url = None
+                    if videos:
+                        trailers = [v for v in videos["results"] if v.get("type")=="Trailer" and v.get("site")=="YouTube"]
+                        if trailers:
+                            trailer_url = f"https://www.youtube.com/watch?v={trailers[0]['key']}"
+
+                    if trailer_url and trailer_url != movie["trailer_url"]:
+                        movie["trailer_url"] = trailer_url; fields.add("trailer_url")
+
+                    if fields:
+                        dirty_movies.append(Movie(pk=movie_pk, **{f: movie[f] for f in self.ENRICH_FIELDS}))
+                        dirty_fields |= fields
+
+                    if new["genres"] != current_genres[movie_pk]:
+                        genre_links[movie_pk] = [genre_map[name].pk for name in new["genres"]]
+
+                    updated += 1
+                    self.stdout.write(f"[{idx}/{total}] Updated Movie pk={movie_pk}")
+
+                self.write_chunk(dirty_movies, dirty_fields, genre_links)
 
         self.stdout.write(self.style.SUCCESS(f"\nDone. Enriched {updated} of {total} movies."))
 
+    def write_chunk(self, dirty_movies, dirty_fields, genre_links):
+        """Persist one chunk's column changes and genre links in a single transaction."""
+        through = Movie.genres.through
+        with transaction.atomic():
+            # bulk_update skips Movie.save(); slugs were never rewritten here anyway
+            if dirty_movies:
+                Movie.objects.bulk_update(
+                    dirty_movies,
+                    fields=[f for f in self.ENRICH_FIELDS if f in dirty_fields],
+                    batch_size=500,
+                )
+
+            # Replace the links of every movie whose genres changed
+            if genre_links:
+                through.objects.filter(movie_id__in=genre_links).delete()
+                through.objects.bulk_create(
+                    [
+                        through(movie_id=movie_pk, genre_id=genre_pk)
+                        for movie_pk, genre_pks in genre_links.items()
+                        for genre_pk in genre_pks
+                    ],
+                    ignore_conflicts=True,
+                )
@@ -1,6 +1,6 @@
 
 from django.core.management.base import BaseCommand
-from django.db.models import Count, Avg
+from django.db.models import Count, Avg, Q
 from django.contrib.auth import get_user_model
 from recommendations.models import Movie, Rating
 
@@ -10,39 +10,62 @@ class Command(BaseCommand):
     help = "Print summary statistics of Users, Movies, and Ratings in the database."
 
     def handle(self, *args, **options):
-        # Users
-        total_users = User.objects.count()
+        # Users (the ratings join repeats users, hence distinct for the total)
+        user_stats = User.objects.aggregate(
+            total=Count('id', distinct=True),
+            zero=Count('id', filter=Q(ratings__isnull=True)),
+        )
+        total_users = user_stats['total']
         self.stdout.write(f"Total users: {total_users}")
 
         # Movies
-        total_movies = Movie.objects.count()
-        enriched_movies = Movie.objects.exclude(overview__isnull=True).exclude(overview="").count()
+        movie_stats = Movie.objects.aggregate(
+            total=Count('id'),
+            enriched=Count('id', filter=Q(overview__isnull=False) & ~Q(overview="")),
+        )
+        total_movies = movie_stats['total']
+        enriched_movies = movie_stats['enriched']
         unenriched_movies = total_movies - enriched_movies
         self.stdout.write(f"Total movies: {total_movies}")
         self.stdout.write(f"  Enriched movies (having overview): {enriched_movies}")
         self.stdout.write(f"  Unenriched movies: {unenriched_movies}")
 
         # Ratings
-        total_ratings = Rating.objects.count()
-        avg_rating_global = Rating.objects.aggregate(avg=Avg('score'))['avg']
+        rating_stats = Rating.objects.aggregate(total=Count('id'), avg=Avg('score'))
+        total_ratings = rating_stats['total']
+        avg_rating_global = rating_stats['avg']
         self.stdout.write(f"Total ratings: {total_ratings}")
         self.stdout.write(f"  Global average rating: {avg_rating_global:.2f}")
 
-        # Top 5 movies by number of ratings
-        top_movies = (
-            Movie.objects.annotate(num_ratings=Count('ratings'))
-            .order_by('-num_ratings')[:5]
+        # Top 5 and bottom 5 (excluding 0) movies by number of ratings, from
+        # one pass over the ratings table
+        ranked = list(Movie.objects.raw(f"""
+            WITH counts AS (
+                SELECT m.id, m.title, m.movielens_id, COUNT(r.id) AS num_ratings
+                FROM {Movie._meta.db_table} m
+                LEFT JOIN {Rating._meta.db_table} r ON r.movie_id = m.id
+                GROUP BY m.id
+            )
+            SELECT * FROM (
+                SELECT counts.*,
+                       ROW_NUMBER() OVER (ORDER BY num_ratings DESC, id) AS top_rank,
+                       CASE WHEN num_ratings > 0 THEN
+                           ROW_NUMBER() OVER (PARTITION BY num_ratings > 0 ORDER BY num_ratings, id)
+                       END AS bottom_rank
+                FROM counts
+            ) ranked
+            WHERE top_rank <= 5 OR bottom_rank <= 5
+        """))
+        top_movies = sorted((m for m in ranked if m.top_rank <= 5), key=lambda m: m.top_rank)
+        bottom_movies = sorted(
+            (m for m in ranked if m.bottom_rank is not None and m.bottom_rank <= 5),
+            key=lambda m: m.bottom_rank,
         )
+
         self.stdout.write("\nTop 5 Movies by number of ratings:")
         for m in top_movies:
             self.stdout.write(f"  {m.title} (movielens_id={m.movielens_id}) - {m.num_ratings} ratings")
 
-        # Bottom 5 movies by number of ratings (excluding 0)
-        bottom_movies = (
-            Movie.objects.annotate(num_ratings=Count('ratings'))
-            .filter(num_ratings__gt=0)
-            .order_by('num_ratings')[:5]
-        )
         self.stdout.write("\nBottom 5 Movies by number of ratings (excluding 0):")
         for m in bottom_movies:
             self.stdout.write(f"  {m.title} (movielens_id={m.movielens_id}) - {m.num_ratings} ratings")
@@ -58,7 +81,7 @@ class Command(BaseCommand):
             self.stdout.write(f"  {name} (id={u.id}) - {u.num_ratings} ratings")
 
         # Users with zero ratings
-        zero_users = User.objects.annotate(num_ratings=Count('ratings')).filter(num_ratings=0).count()
+        zero_users = user_stats['zero']
         self.stdout.write(f"\nUsers with zero ratings: {zero_users}")
 
         self.stdout.write(self.style.SUCCESS("\nDatabase inspection completed."))
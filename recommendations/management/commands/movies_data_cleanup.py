@@ -2,6 +2,7 @@
 
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Case, When
 from django.utils import timezone
 from datetime import timedelta
 from recommendations.models import Movie
@@ -34,38 +35,26 @@ class Command(BaseCommand):
         today         = timezone.now().date()
         cutoff_date   = today.replace(year=today.year - recent_years)
 
-        # 1) Pick “current” movies
-        current_qs = (
+        # 1) Rank “current” movies first, then the all-time top-rated,
+        #    and keep the first `max_count` of that ranking
+        keep_qs = (
             Movie.objects
-            .filter(release_date__gte=cutoff_date)
-            .order_by("-average_rating")
-        )
-        current_ids = list(current_qs.values_list("id", flat=True)[:max_count])
-
-        # 2) Fill the rest with all-time top-rated
-        remaining = max_count - len(current_ids)
-        if remaining > 0:
-            top_qs = (
-                Movie.objects
-                .exclude(id__in=current_ids)
-                .order_by("-average_rating")
+            .order_by(
+                Case(When(release_date__gte=cutoff_date, then=0), default=1),
+                "-average_rating",
             )
-            top_ids = list(top_qs.values_list("id", flat=True)[:remaining])
-        else:
-            top_ids = []
-
-        keep_ids = set(current_ids + top_ids)
-
-        # 3) Delete everything else in one go
-        to_delete_qs = Movie.objects.exclude(id__in=keep_ids)
-        count_to_delete = to_delete_qs.count()
+            .values("id")[:max_count]
+        )
 
-        if count_to_delete:
-            with transaction.atomic():
-                to_delete_qs.delete()
+        # 2) Delete everything else; the ranking runs as a subquery, so no
+        #    id lists are shipped back and forth
+        with transaction.atomic():
+            _, deleted = Movie.objects.exclude(id__in=keep_qs).delete()
+        count_to_delete = deleted.get(Movie._meta.label, 0)
+        kept = Movie.objects.count()
 
         self.stdout.write(self.style.SUCCESS(
-            f"✅ Pruned {count_to_delete} movies. Kept {len(keep_ids)} total."
+            f"✅ Pruned {count_to_delete} movies. Kept {kept} total."
         ))
 
 
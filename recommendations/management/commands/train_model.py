@@ -8,5 +8,5 @@ class Command(BaseCommand):
         from recommendations.utils import train_and_save_model
 
         self.stdout.write("Training recommendation model…")
-        algo = train_and_save_model()
+        train_and_save_model()
         self.stdout.write(self.style.SUCCESS("✅ Model trained and saved successfully!"))
\ No newline at end of file
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-15 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                """
+                CREATE MATERIALIZED VIEW recommendations_genretopmovie AS
+                SELECT mg.id, mg.genre_id, mg.movie_id,
+                       row_number() OVER (
+                           PARTITION BY mg.genre_id
+                           ORDER BY m.average_rating DESC, m.id
+                       ) AS rank
+                FROM recommendations_movie_genres mg
+                JOIN recommendations_movie m ON m.id = mg.movie_id
+                """,
+                # Unique, so the view can be refreshed CONCURRENTLY
+                "CREATE UNIQUE INDEX genretopmovie_genre_rank_idx "
+                "ON recommendations_genretopmovie (genre_id, rank)",
+            ],
+            reverse_sql="DROP MATERIALIZED VIEW recommendations_genretopmovie",
+        ),
+        migrations.CreateModel(
+            name='GenreTopMovie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+            ],
+            options={
+                'db_table': 'recommendations_genretopmovie',
+                'ordering': ['genre_id', 'rank'],
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-15 09:37
+
+from django.db import migrations
+
+
+GENRETOPMOVIE_SQL = """
+CREATE MATERIALIZED VIEW recommendations_genretopmovie AS
+SELECT mg.id, mg.genre_id, mg.movie_id,{columns}
+       row_number() OVER (
+           PARTITION BY mg.genre_id
+           ORDER BY m.average_rating DESC, m.id
+       ) AS rank
+FROM recommendations_movie_genres mg
+JOIN recommendations_movie m ON m.id = mg.movie_id
+"""
+# Unique, so the view can be refreshed CONCURRENTLY
+GENRE_RANK_INDEX_SQL = (
+    "CREATE UNIQUE INDEX genretopmovie_genre_rank_idx "
+    "ON recommendations_genretopmovie (genre_id, rank)"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_movie_title_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                "DROP MATERIALIZED VIEW recommendations_genretopmovie",
+                GENRETOPMOVIE_SQL.format(columns=" m.release_date,"),
+                GENRE_RANK_INDEX_SQL,
+                # A genre's movies from a date range, already in rank order
+                "CREATE INDEX genretopmovie_genre_release_idx "
+                "ON recommendations_genretopmovie (genre_id, release_date, rank)",
+            ],
+            reverse_sql=[
+                "DROP MATERIALIZED VIEW recommendations_genretopmovie",
+                GENRETOPMOVIE_SQL.format(columns=""),
+                GENRE_RANK_INDEX_SQL,
+            ],
+        ),
+    ]
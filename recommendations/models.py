@@ -1,9 +1,13 @@
-from django.db import models
+import re
+
+from django.db import IntegrityError, connection, models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Avg, F
+from django.db.models import Avg, Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from decimal import Decimal
 from django.core.cache import cache
 
@@ -23,6 +27,10 @@ class Genre(models.Model):
         help_text=_("URL-safe identifier generated from the name."),
     )
 
+    # Invalidated by recommendations.signals whenever a genre is saved or deleted
+    IDS_CACHE_KEY = "recommendations:genre_ids"
+    IDS_CACHE_TIMEOUT = 300
+
     class Meta:
         ordering = ["name"]
         indexes = [
@@ -34,6 +42,18 @@ class Genre(models.Model):
         self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def cached_ids(cls):
+        """
+        Set of all genre primary keys, cached so validating genre ids doesn't
+        cost a query per id.
+        """
+        return cache.get_or_set(
+            cls.IDS_CACHE_KEY,
+            lambda: set(cls.objects.values_list("pk", flat=True)),
+            timeout=cls.IDS_CACHE_TIMEOUT,
+        )
+
     def __str__(self):
         return self.name
 
@@ -117,38 +137,76 @@ class Movie(models.Model):
         indexes = [
             models.Index(fields=["movielens_id"], name="movie_ml_id_idx"),
             models.Index(fields=["slug"], name="movie_slug_idx"),
+            # Trigram index over the expression title__icontains compares
+            # (UPPER(title) LIKE UPPER('%q%')), so search doesn't scan the table
+            GinIndex(OpClass(Upper("title"), name="gin_trgm_ops"), name="movie_title_trgm_idx"),
         ]
 
     def save(self, *args, **kwargs):
-        # 1) Generate the “base” slug from title
-        base_slug = slugify(self.title)
-
-        # 2) If this is a new object, or the title changed, we need to (re)generate slug
-        if not self.slug or self.slug != base_slug:
-            slug = base_slug
-            counter = 1
+        # 1) Generate the “base” slug from title; titles in non-Latin scripts
+        #    slugify to "", so fall back to the TMDB id
+        base_slug = slugify(self.title) or (f"tmdb-{self.tmdb_id}" if self.tmdb_id else "movie")
 
-            # 3) Loop until we find a slug that isn’t taken by another movie
-            while Movie.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
+        # 2) If this is a new object, or the title changed, we need to (re)generate slug.
+        #    A save limited to other columns would discard it, so skip the lookup then.
+        update_fields = kwargs.get("update_fields")
+        if (not self.slug or self.slug != base_slug) and (update_fields is None or "slug" in update_fields):
+            self.slug = self._free_slug(base_slug)
 
-            self.slug = slug
+            # 3) Another movie may claim the same slug between the lookup and
+            #    the write; the unique index rejects it, so pick again.
+            for _attempt in range(3):
+                try:
+                    with transaction.atomic():
+                        return super().save(*args, **kwargs)
+                except IntegrityError:
+                    slug = self._free_slug(base_slug)
+                    if slug == self.slug:
+                        raise  # not a slug clash
+                    self.slug = slug
 
         super().save(*args, **kwargs)
 
+    def _free_slug(self, base_slug):
+        """
+        First of base_slug, base_slug-1, base_slug-2, … that no other movie
+        uses, found with a single query over just those candidates.
+        """
+        taken = set(
+            Movie.objects.filter(slug__regex=rf"^{re.escape(base_slug)}(-\d+)?$")
+            .exclude(pk=self.pk)
+            .order_by()
+            .values_list("slug", flat=True)
+        )
+        slug, counter = base_slug, 1
+        while slug in taken:
+            slug = f"{base_slug}-{counter}"
+            counter += 1
+        return slug
+
+    @classmethod
+    def refresh_average_ratings(cls, movie_ids):
+        """
+        Recompute average_rating of the given movies from their ratings in a
+        single UPDATE; movies without ratings get 0.00.
+        """
+        return cls.objects.filter(pk__in=movie_ids).update(
+            average_rating=Coalesce(
+                Subquery(
+                    Rating.objects.filter(movie=OuterRef("pk"))
+                    .values("movie")
+                    .annotate(avg=Avg("score"))
+                    .values("avg")
+                ),
+                Value(Decimal("0.00")),
+            )
+        )
+
     def update_average_rating(self):
         """
-        Recalculate and persist the average rating only if it has changed.
+        Recalculate and persist the average rating in one statement.
         """
-        agg = self.ratings.aggregate(avg=Avg('score'))['avg'] or Decimal('0.00')
-        # ensure agg is a Decimal to match the field type
-        if not isinstance(agg, Decimal):
-            agg = Decimal(str(agg))
-        if self.average_rating != agg:
-            self.average_rating = agg
-            # only update that one column
-            self.save(update_fields=['average_rating'])
+        Movie.refresh_average_ratings([self.pk])
 
     def __str__(self):
         # Show title plus year, for readability
@@ -196,6 +254,16 @@ class Watchlist(models.Model):
             models.Index(fields=["user", "watched"], name="watchlist_user_watched_idx"),
         ]
 
+    @classmethod
+    def contains(cls, user, movie_ref="pk"):
+        """
+        Boolean expression for annotating a queryset with whether the row's
+        movie (``movie_ref`` on the outer query) is on ``user``'s watchlist.
+        """
+        if not user or user.is_anonymous:
+            return Value(False)
+        return Exists(cls.objects.filter(user=user, movie=OuterRef(movie_ref)))
+
     def __str__(self):
         status = "✓" if self.watched else "⏳"
         return f"{status} {self.user.get_full_name()} – {self.movie.title}"
@@ -226,3 +294,49 @@ class Rating(models.Model):
 
     def __str__(self):
         return f"{self.score:.1f} by {self.user.get_short_name()} on {self.movie.title}"
+
+
+class GenreTopMovie(models.Model):
+    """
+    Every genre's movies ranked by average rating (rank 1 = best), read from a
+    materialized view created in migration 0002. Rows go stale until the next
+    refresh(), which Celery beat runs every few minutes.
+    """
+    genre = models.ForeignKey(Genre, on_delete=models.DO_NOTHING, related_name="+")
+    movie = models.ForeignKey(Movie, on_delete=models.DO_NOTHING, related_name="+")
+    rank = models.PositiveIntegerField()
+    # Copied from the movie (migration 0004) so the per-year sections can use
+    # the view's (genre, release_date, rank) index without joining movies
+    release_date = models.DateField(null=True)
+
+    # Versions the cached genre pages; bumped by refresh() and by
+    # recommendations.signals whenever a movie is saved or deleted
+    CACHE_VERSION_KEY = "recommendations:genre_top_movies:version"
+
+    class Meta:
+        managed = False
+        db_table = "recommendations_genretopmovie"
+        ordering = ["genre_id", "rank"]
+
+    @classmethod
+    def refresh(cls):
+        """Recompute the view without blocking readers of the old one."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"REFRESH MATERIALIZED VIEW CONCURRENTLY {connection.ops.quote_name(cls._meta.db_table)}"
+            )
+        cls.bump_cache_version()
+
+    @classmethod
+    def cache_version(cls):
+        return cache.get_or_set(cls.CACHE_VERSION_KEY, 1, timeout=None)
+
+    @classmethod
+    def bump_cache_version(cls):
+        try:
+            cache.incr(cls.CACHE_VERSION_KEY)
+        except ValueError:  # not set yet
+            cache.set(cls.CACHE_VERSION_KEY, 1, timeout=None)
+
+    def __str__(self):
+        return f"#{self.rank} in {self.genre_id}: {self.movie_id}"
@@ -1,10 +1,30 @@
+from collections import defaultdict
+
 from rest_framework import serializers
 from recommendations.models import Movie, Genre, Comment, Watchlist, Rating
 
 
 
+# Columns of MovieMiniSerializer apart from in_watchlist, in output order
+MOVIE_MINI_FIELDS = ("id", "slug", "title", "poster_url", "average_rating", "overview")
+
+
+def movie_mini_row(values, in_watchlist=False):
+    """
+    A MovieMiniSerializer row built straight from a MOVIE_MINI_FIELDS tuple,
+    as list endpoints fetch them with values_list(), skipping DRF's per-field
+    dispatch. average_rating comes back from the column already at two
+    decimal places, so str() gives the same string as the DecimalField.
+    """
+    row = dict(zip(MOVIE_MINI_FIELDS, values))
+    row["average_rating"] = str(row["average_rating"])
+    row["in_watchlist"] = in_watchlist
+    return row
+
+
 class MovieMiniSerializer(serializers.ModelSerializer):
-    in_watchlist = serializers.SerializerMethodField()
+    # Annotated by the view with Watchlist.contains()
+    in_watchlist = serializers.BooleanField(read_only=True)
     
     class Meta:
         model  = Movie
@@ -17,12 +37,6 @@ class MovieMiniSerializer(serializers.ModelSerializer):
             "overview",
             "in_watchlist",
         ]
-        
-    def get_in_watchlist(self, obj):
-        user = self.context.get("request").user
-        if not user or user.is_anonymous:
-            return False
-        return obj.watchlisted_by.filter(pk=user.pk).exists()
 
 
 class GenreWithMoviesSerializer(serializers.ModelSerializer):
@@ -105,7 +119,8 @@ class MovieDetailSerializer(serializers.ModelSerializer):
     average_rating = serializers.DecimalField(max_digits=4, decimal_places=2)
     # cast = serializers.ListField(child=serializers.CharField(), source="cast_list")  
     comments = CommentSerializer(many=True)
-    in_watchlist = serializers.SerializerMethodField()
+    # Annotated by the view with Watchlist.contains()
+    in_watchlist = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Movie
@@ -116,12 +131,6 @@ class MovieDetailSerializer(serializers.ModelSerializer):
             "genres", "comments", "in_watchlist"
         ]
 
-    def get_in_watchlist(self, obj):
-        user = self.context.get("request").user
-        if not user or user.is_anonymous:
-            return False
-        return obj.watchlisted_by.filter(user=user).exists()
-
 
 class MovieWatchlistSerializer(serializers.ModelSerializer):
     title = serializers.CharField(
@@ -146,6 +155,44 @@ class MovieWatchlistSerializer(serializers.ModelSerializer):
         return True
 
 
+class WatchlistListSerializer(serializers.ListSerializer):
+    """
+    Builds the watchlist rows directly instead of running MovieCardSerializer
+    and GenreSerializer per entry. The genres of every movie on the page come
+    from one query on the movie/genre table, grouped by movie.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+
+        genres = defaultdict(list)
+        genre_rows = Movie.genres.through.objects.filter(
+            movie_id__in={item.movie_id for item in items}
+        ).order_by("genre__name").values_list("movie_id", "genre_id", "genre__name", "genre__slug")
+        for movie_id, genre_id, name, slug in genre_rows:
+            genres[movie_id].append({"id": genre_id, "name": name, "slug": slug})
+
+        # Reuse the declared fields' formatting for the non-trivial values
+        average_rating = self.child.fields["movie"].fields["average_rating"]
+        added_on = self.child.fields["added_on"]
+        return [
+            {
+                "movie": {
+                    "id": item.movie.id,
+                    "slug": item.movie.slug,
+                    "title": item.movie.title,
+                    "poster_url": item.movie.poster_url,
+                    "average_rating": average_rating.to_representation(item.movie.average_rating),
+                    "overview": item.movie.overview,
+                    "genres": genres[item.movie_id],
+                },
+                "watched": item.watched,
+                "added_on": added_on.to_representation(item.added_on),
+            }
+            for item in items
+        ]
+
+
 class WatchlistSerializer(serializers.ModelSerializer):
     """
     The data for GET /api/watchlist/
@@ -164,6 +211,7 @@ class WatchlistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Watchlist
         fields = ["movie", "watched", "added_on"]
+        list_serializer_class = WatchlistListSerializer
         
         
 
@@ -1,10 +1,19 @@
 # recommendations/signals.py
 
 import logging
-from django.db.models.signals import post_save, post_delete
+from functools import partial
+
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.core.cache import cache
 from django.dispatch import receiver
 
-from .models import Rating
+from .models import Genre, GenreTopMovie, Movie, Rating
+from .tasks import schedule_average_refresh, schedule_recommendations_refresh
+from .utils import RECOMMENDATIONS_CACHE_KEY
+
+User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
@@ -12,11 +21,66 @@ logger = logging.getLogger(__name__)
 @receiver(post_delete, sender=Rating)
 def update_movie_average_after_rating_change(sender, instance, **kwargs):
     """
-    Whenever a Rating is created, updated, or deleted,
-    recalculate its movie's average_rating field.
+    Whenever a Rating is created, updated, or deleted, queue a recalculation
+    of its movie's average_rating field once the transaction commits.
+    """
+    # A save that didn't touch the score can't change the average
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "score" not in update_fields:
+        return
+    transaction.on_commit(partial(schedule_average_refresh, instance.movie_id))
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def refresh_recommendations_after_rating_change(sender, instance, **kwargs):
+    """
+    A new, changed or removed rating changes what the user should be
+    recommended, so recompute their cached recommendations once the
+    transaction commits.
+    """
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "score" not in update_fields:
+        return
+    transaction.on_commit(partial(schedule_recommendations_refresh, instance.user_id))
+
+
+@receiver(m2m_changed, sender=User.preferred_genres.through)
+def invalidate_recommendations_after_genre_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Genre-based recommendations follow the user's preferred genres, so drop the
+    cached ones when those change. They're recomputed on the next request.
+    """
+    if not reverse:
+        if not action.startswith("post_"):
+            return
+        user_ids = [instance.pk]
+    elif action in ("post_add", "post_remove"):
+        user_ids = pk_set
+    elif action == "pre_clear":
+        # A clear from the genre side sends no pk_set; find its users first
+        user_ids = list(User.objects.filter(preferred_genres=instance).values_list("pk", flat=True))
+    else:
+        return
+    cache.delete_many([RECOMMENDATIONS_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_ids_cache(sender, instance, **kwargs):
+    """
+    Drop the cached set of genre ids, and the cached genre pages, when a genre
+    is added, renamed or removed.
+    """
+    cache.delete(Genre.IDS_CACHE_KEY)
+    GenreTopMovie.bump_cache_version()
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def invalidate_genre_pages_cache(sender, instance, **kwargs):
+    """
+    Start a new version of the cached genre pages when a movie is edited or
+    removed, so they don't keep serving its old title, poster or rating.
     """
-    try:
-        instance.movie.update_average_rating()
-        logger.debug(f"Updated average_rating for movie {instance.movie.pk}")
-    except Exception as e:
-        logger.error(f"Failed to update average for movie {instance.movie.pk}: {e}")
+    GenreTopMovie.bump_cache_version()
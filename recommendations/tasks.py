@@ -0,0 +1,96 @@
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+
+from recommendations.models import GenreTopMovie, Movie
+from recommendations.utils import RECOMMENDATIONS_CACHE_KEY, compute_user_recommendations
+
+logger = logging.getLogger(__name__)
+
+# Rating changes to one movie within this many seconds share one recompute
+AVERAGE_REFRESH_DELAY = 5
+AVERAGE_REFRESH_PENDING_KEY = "recommendations:average_refresh_pending:{movie_id}"
+# Likewise for a user's recommendations
+RECOMMENDATIONS_REFRESH_DELAY = 5
+RECOMMENDATIONS_REFRESH_PENDING_KEY = "recommendations:recs_refresh_pending:{user_id}"
+
+
+def schedule_average_refresh(movie_id):
+    """
+    Queue refresh_movie_average for a movie unless one is already pending.
+    Falls back to recomputing in-process if the task can't be queued.
+    """
+    key = AVERAGE_REFRESH_PENDING_KEY.format(movie_id=movie_id)
+    try:
+        if cache.add(key, True, timeout=AVERAGE_REFRESH_DELAY * 12):
+            refresh_movie_average.apply_async(
+                (movie_id,), countdown=AVERAGE_REFRESH_DELAY, retry=False
+            )
+    except Exception as e:
+        logger.error(f"Could not queue average refresh for movie {movie_id}: {e}")
+        cache.delete(key)
+        Movie.refresh_average_ratings([movie_id])
+
+
+def schedule_recommendations_refresh(user_id):
+    """
+    Queue recompute_user_recommendations for a user unless one is already
+    pending. The cached recommendations keep being served until the task
+    overwrites them; if it can't be queued they're dropped instead, so the
+    next request to RecommendMoviesView computes them.
+    """
+    key = RECOMMENDATIONS_REFRESH_PENDING_KEY.format(user_id=user_id)
+    try:
+        if cache.add(key, True, timeout=RECOMMENDATIONS_REFRESH_DELAY * 12):
+            recompute_user_recommendations.apply_async(
+                (user_id,), countdown=RECOMMENDATIONS_REFRESH_DELAY, retry=False
+            )
+    except Exception as e:
+        logger.error(f"Could not queue recommendations refresh for user {user_id}: {e}")
+        cache.delete_many([key, RECOMMENDATIONS_CACHE_KEY.format(user_id=user_id)])
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def refresh_genre_top_movies(self):
+    """
+    Celery task: recomputes the per-genre movie rankings behind the genre pages.
+    Scheduled by CELERY_BEAT_SCHEDULE; retries up to 3 times on any exception.
+    """
+    try:
+        GenreTopMovie.refresh()
+        logger.info("Refreshed genre top movies.")
+    except Exception as exc:
+        logger.exception(f"Error refreshing genre top movies: {exc}")
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def refresh_movie_average(self, movie_id):
+    """
+    Celery task: recomputes one movie's average_rating after its ratings changed.
+    Retries up to 3 times on any exception.
+    """
+    # Changes from here on need a new run, since this one may miss them
+    cache.delete(AVERAGE_REFRESH_PENDING_KEY.format(movie_id=movie_id))
+    try:
+        Movie.refresh_average_ratings([movie_id])
+        logger.debug(f"Updated average_rating for movie {movie_id}")
+    except Exception as exc:
+        logger.exception(f"Error updating average for movie {movie_id}: {exc}")
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def recompute_user_recommendations(self, user_id):
+    """
+    Celery task: recomputes and caches one user's recommendations after they
+    rated something. Retries up to 3 times on any exception.
+    """
+    cache.delete(RECOMMENDATIONS_REFRESH_PENDING_KEY.format(user_id=user_id))
+    try:
+        compute_user_recommendations(user_id)
+        logger.debug(f"Recomputed recommendations for user {user_id}")
+    except Exception as exc:
+        logger.exception(f"Error recomputing recommendations for user {user_id}: {exc}")
+        raise self.retry(exc=exc)
@@ -1,3 +1,166 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, TestCase
+
+from recommendations import utils
+from recommendations.models import Movie, Rating
+from recommendations.utils import SVDModel
+
+User = get_user_model()
+
+
+def make_model(user_ids=(1, 2)):
+    """
+    Two users and three items (movielens ids 10, 20, 30). Every value is
+    exact in float16, so expected scores can be written out by hand.
+    """
+    return SVDModel(
+        pu=np.array([[1.0, 0.5], [0.0, 2.0]], dtype=np.float16),
+        qi=np.array([[1.0, 1.0], [0.5, -1.0], [2.0, 0.0]], dtype=np.float16),
+        bu=np.array([0.25, -0.5], dtype=np.float32),
+        bi=np.array([0.5, -1.0, -1.0], dtype=np.float32),
+        user_ids=np.array(user_ids),
+        item_ids=np.array([10, 20, 30]),
+        meta=np.array([3.5, 0.5, 5.0], dtype=np.float32),
+    )
+
+
+class SVDModelPredictTests(SimpleTestCase):
+    def setUp(self):
+        self.model = make_model()
+        self.items = np.arange(3)
+
+    def expected(self, uinner):
+        """global_mean + bu + bi + pu·qi, in float64, clipped to the scale."""
+        global_mean, low, high = self.model.meta.astype(np.float64)
+        qi = self.model.qi.astype(np.float64)
+        bi = self.model.bi.astype(np.float64)
+        if uinner is None:
+            scores = global_mean + bi
+        else:
+            pu = self.model.pu[uinner].astype(np.float64)
+            scores = global_mean + self.model.bu[uinner] + bi + qi @ pu
+        return np.clip(scores, low, high)
+
+    def test_matches_formula(self):
+        for uinner in (0, 1):
+            np.testing.assert_allclose(
+                self.model.predict_batch(uinner, self.items), self.expected(uinner), rtol=1e-6
+            )
+
+    def test_clips_to_rating_scale(self):
+        # user 0, item 0: 3.5 + 0.25 + 0.5 + 1.5 = 5.75
+        self.assertEqual(self.model.predict_batch(0, np.array([0]))[0], 5.0)
+        # user 1, item 1: 3.5 - 0.5 - 1.0 - 2.0 = 0.0
+        self.assertEqual(self.model.predict_batch(1, np.array([1]))[0], 0.5)
+
+    def test_unknown_user_gets_item_baseline(self):
+        np.testing.assert_allclose(
+            self.model.predict_batch(None, self.items), [4.0, 2.5, 2.5], rtol=1e-6
+        )
+        self.assertAlmostEqual(self.model.predict(raw_uid=999, raw_iid=10), 4.0, places=5)
+
+    def test_unknown_item_gets_global_mean(self):
+        self.assertAlmostEqual(self.model.predict(raw_uid=1, raw_iid=999), 3.5, places=5)
+
+
+class TopNRecommendationsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="viewer@example.com", password="pass1234!", first_name="View", last_name="Er"
+        )
+        self.movies = [
+            Movie.objects.create(title=f"Movie {mlid}", movielens_id=str(mlid)) for mlid in (10, 20, 30)
+        ]
+        # Not in the model, so never recommended
+        Movie.objects.create(title="Unscored")
+        Rating.objects.create(user=self.user, movie=self.movies[0], score=Decimal("4.0"))
+
+        self.model = make_model(user_ids=(self.user.pk, self.user.pk + 1))
+        patcher = mock.patch.object(utils, "load_model", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        utils._cached_item_index = None
+        self.addCleanup(setattr, utils, "_cached_item_index", None)
+
+    def test_excludes_rated_movies_and_sorts_by_score(self):
+        recs = utils.get_top_n_recommendations(self.user.pk, n=10)
+
+        # item 2: 3.5 + 0.25 - 1.0 + 2.0; item 1: 3.5 + 0.25 - 1.0 + 0.0
+        self.assertEqual([pk for pk, _ in recs], [self.movies[2].pk, self.movies[1].pk])
+        np.testing.assert_allclose([score for _, score in recs], [4.75, 2.75], rtol=1e-6)
+
+    def test_returns_at_most_n(self):
+        recs = utils.get_top_n_recommendations(self.user.pk, n=1)
+
+        self.assertEqual([pk for pk, _ in recs], [self.movies[2].pk])
+
+    def test_everything_rated(self):
+        for movie in self.movies[1:]:
+            Rating.objects.create(user=self.user, movie=movie, score=Decimal("3.0"))
+
+        self.assertEqual(utils.get_top_n_recommendations(self.user.pk), [])
+
+
+class TrainAndLoadModelTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        arrays_dir = os.path.join(tmp, "svd")
+        patcher = mock.patch.multiple(
+            utils,
+            MODEL_DIR=tmp,
+            MODEL_ARRAYS_DIR=arrays_dir,
+            CURRENT_MODEL_FILE=os.path.join(arrays_dir, "current"),
+            default_storage=FileSystemStorage(location=os.path.join(tmp, "storage")),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, utils, "_cached_model", None)
+
+        users = [
+            User.objects.create_user(
+                email=f"user{i}@example.com", password="pass1234!", first_name="U", last_name=str(i)
+            )
+            for i in range(4)
+        ]
+        movies = [Movie.objects.create(title=f"Movie {i}", movielens_id=str(i)) for i in range(1, 5)]
+        for u, user in enumerate(users):
+            for m, movie in enumerate(movies):
+                if (u + m) % 3:
+                    Rating.objects.create(user=user, movie=movie, score=Decimal(1 + (u * m) % 5))
+
+    def assertSameModel(self, loaded, trained):
+        for name, array in trained.arrays().items():
+            np.testing.assert_array_equal(getattr(loaded, name), array, err_msg=name)
+
+    def test_round_trip(self):
+        trained = utils.train_and_save_model(n_factors=2, bias_epochs=5)
+
+        loaded = utils.load_model()
+        self.assertSameModel(loaded, trained)
+        raw_uid, raw_iid = int(trained.user_ids[0]), int(trained.item_ids[0])
+        self.assertEqual(loaded.predict(raw_uid, raw_iid), trained.predict(raw_uid, raw_iid))
+
+    def test_load_falls_back_to_stored_copy(self):
+        trained = utils.train_and_save_model(n_factors=2, bias_epochs=5)
+        # A fresh host: nothing exported locally yet
+        shutil.rmtree(utils.MODEL_ARRAYS_DIR)
+        utils._cached_model = None
+
+        self.assertSameModel(utils.load_model(), trained)
+
+    def test_retrain_swaps_current_version(self):
+        utils.train_and_save_model(n_factors=2, bias_epochs=5)
+        first = utils._current_arrays_dir()
+        utils.train_and_save_model(n_factors=2, bias_epochs=5)
+
+        self.assertNotEqual(utils._current_arrays_dir(), first)
+        self.assertTrue(os.path.exists(os.path.join(utils._current_arrays_dir(), "meta.npy")))
@@ -1,17 +1,107 @@
+import threading
+import time
+
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util.retry import Retry
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: allows `rate` calls per `per` seconds,
+    blocking callers until a token is available.
+    """
+
+    def __init__(self, rate=40, per=10.0):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.fill_rate
+            time.sleep(wait)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that takes a token before each request it sends. Responses
+    served from the local cache never reach the adapter, so they are free.
+    """
+
+    def __init__(self, rate_limiter, **kwargs):
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.rate_limiter.acquire()
+        return super().send(request, **kwargs)
+
+
+class CappedRetry(Retry):
+    """
+    Retry that honours Retry-After (seconds or HTTP-date) but never sleeps
+    longer than `max_retry_after` seconds on a single attempt.
+    """
+
+    max_retry_after = 60
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.max_retry_after)
+
+
+def tmdb_session(rate_limiter=None):
+    """
+    Pooled, rate-limited session whose GET responses are cached on disk
+    (see TMDB_CACHE_PATH). The api_key is left out of cache keys.
+    """
+    session = CachedSession(
+        settings.TMDB_CACHE_PATH,
+        backend='sqlite',
+        expire_after=settings.TMDB_CACHE_EXPIRE_AFTER,
+        allowable_methods=('GET',),
+        ignored_parameters=['api_key'],
+    )
+    session.mount('https://', RateLimitedAdapter(
+        rate_limiter or RateLimiter(),
+        pool_connections=16,
+        pool_maxsize=16,
+        max_retries=CappedRetry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+        ),
+    ))
+    return session
+
+
 class TMDbClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, session=None):
         self.api_key = api_key
         self.base_url = 'https://api.themoviedb.org/3'
+        # One session shared by every worker thread
+        self.session = session or tmdb_session()
 
     def make_request(self, url, params):
         try:
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()  # Raises an HTTPError for bad responses
             return response.json()
         except requests.RequestException as e:
@@ -58,7 +148,7 @@ class TMDbClient:
         """
         url = f"{self.base_url}/movie/{tmdb_id}/images"
         params = {'api_key': self.api_key}
-        response = requests.get(url, params=params)
+        response = self.session.get(url, params=params, timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
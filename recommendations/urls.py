@@ -11,11 +11,11 @@ router.register(r'movies', MovieViewSet, basename='movie')
 
 
 urlpatterns = [
+    # Ahead of the router, whose movies/<slug>/ would otherwise match "search"
+    path('movies/search/', views.MovieSearchView.as_view(), name='movie-search'),
     path("", include(router.urls)),
     path('genres/', views.GenresView.as_view(), name='home'),
     path('genres/<slug:slug>/', views.GenreDetailView.as_view(), name='genre-detail'),
-    path('movies/search/', views.MovieSearchView.as_view(), name='movie-search'),
-    # path('movies/<slug:slug>/', views.MovieDetailView.as_view(), name='movie-detail'),
     path('watchlist/', views.WatchlistView.as_view(), name='watchlist'),
     path('recommendations/', views.RecommendMoviesView.as_view(), name='recommendations'),
     path('ratings/', views.RatingListCreateView.as_view(), name='rating-list-create'),
@@ -1,90 +1,324 @@
+import logging
 import os
 import pickle
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
+from functools import cached_property
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import numpy as np
 import pandas as pd
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.core.files import File
 from django.db.models import Count, Q
 
-from surprise import SVD, Dataset, Reader
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import svds
 
 from recommendations.models import Movie, Rating
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'recommendations', 'models')
+# Local artifact: one .npy per array, so load_model() can memory-map them.
+# Each export is a fresh versioned subdirectory; the CURRENT_MODEL_FILE
+# pointer names the live one and is swapped only once it is complete.
+MODEL_ARRAYS_DIR = os.path.join(MODEL_DIR, 'svd')
+CURRENT_MODEL_FILE = os.path.join(MODEL_ARRAYS_DIR, 'current')
+# Shared copy of the same arrays in Django storage
+MODEL_STORAGE_PATH = 'recommendations/models/svd_model.npz'
+# Pre-npz artifact (a pickled Surprise SVD); still read if no arrays have
+# been exported yet
+LEGACY_MODEL_PATH = os.path.join(MODEL_DIR, 'svd_model.pkl')
+RATING_SCALE = (0.5, 5.0)
+# A user's (movie pk, score) recommendations, served by RecommendMoviesView and
+# recomputed in the background by recompute_user_recommendations
+RECOMMENDATIONS_CACHE_KEY = 'recommendations:user:{user_id}'
+RECOMMENDATIONS_CACHE_TIMEOUT = 60 * 60 * 24
 
 # Cache for loaded model
 _cached_model = None
+# Cache for the Movie.pk -> model item index, tied to _cached_model
+_cached_item_index = None
+
+
+@dataclass
+class SVDModel:
+    """
+    A biased matrix-factorisation model, as used at inference time. Inner ids
+    index the arrays: row i of pu/bu is user user_ids[i], row j of qi/bi is
+    item item_ids[j].
+    """
+    pu: np.ndarray
+    qi: np.ndarray
+    bu: np.ndarray
+    bi: np.ndarray
+    user_ids: np.ndarray
+    item_ids: np.ndarray
+    meta: np.ndarray      # [global_mean, rating_min, rating_max]
+
+    def __post_init__(self):
+        # Raw item ids are integer movielens ids; older artifacts (and the
+        # legacy pickle) stored them as strings
+        if self.item_ids.dtype.kind == 'U':
+            self.item_ids = self.item_ids.astype(np.int64)
+
+    @classmethod
+    def from_algo(cls, algo):
+        """Converts a fitted Surprise SVD, i.e. the legacy pickle."""
+        trainset = algo.trainset
+        return cls(
+            # Only the ranking matters, so the factors are stored at half precision
+            pu=algo.pu.astype(np.float16),
+            qi=algo.qi.astype(np.float16),
+            bu=algo.bu.astype(np.float32),
+            bi=algo.bi.astype(np.float32),
+            user_ids=np.array([trainset.to_raw_uid(i) for i in range(trainset.n_users)]),
+            item_ids=np.array([trainset.to_raw_iid(i) for i in range(trainset.n_items)]),
+            meta=np.array([trainset.global_mean, *trainset.rating_scale], dtype=np.float32),
+        )
+
+    @classmethod
+    def load(cls, directory):
+        return cls(**{
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+            for name in cls.__dataclass_fields__
+        })
+
+    def save(self, directory):
+        """
+        Writes one .npy per array into directory. Never call this on a
+        directory that is being served; see _publish_arrays.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays().items():
+            np.save(os.path.join(directory, f'{name}.npy'), array)
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+    @cached_property
+    def user_index(self):
+        """raw user id -> inner id"""
+        return {raw: inner for inner, raw in enumerate(self.user_ids.tolist())}
+
+    @cached_property
+    def item_index(self):
+        """raw item id -> inner id"""
+        return {raw: inner for inner, raw in enumerate(self.item_ids.tolist())}
+
+    def predict_batch(self, uinner, iinner_vec):
+        """
+        Estimated ratings of one user for many items, computed as SVD.predict
+        does: global_mean + bu + bi + pu·qi, without the user terms when
+        uinner is None (user not in the training set), clipped to the scale.
+        """
+        global_mean, low, high = self.meta.tolist()
+        scores = global_mean + self.bi[iinner_vec]
+        if uinner is not None:
+            # Upcast the gathered float16 rows so the dot product accumulates in float32
+            qi = self.qi[iinner_vec].astype(np.float32)
+            scores += self.bu[uinner] + qi @ self.pu[uinner].astype(np.float32)
+        return np.clip(scores, low, high, out=scores)
+
+    def predict(self, raw_uid, raw_iid):
+        """Single estimate from raw ids; the global mean if the item is unknown."""
+        iinner = self.item_index.get(raw_iid)
+        if iinner is None:
+            return float(self.meta[0])
+        return float(self.predict_batch(self.user_index.get(raw_uid), np.array([iinner]))[0])
+
 
 def _get_ratings_df():
     """
     Returns a DataFrame with columns ['userId', 'movieId', 'rating']
-    from the Django database.
+    from the Django database, movieId being the integer MovieLens id. Rows are streamed straight into preallocated
+    NumPy columns instead of an intermediate list of tuples.
     """
-    qs = Rating.objects.select_related('movie', 'user').values_list(
-        'user__id', 'movie__movielens_id', 'score'
+    qs = Rating.objects.filter(movie__movielens_id__isnull=False).values_list(
+        'user_id', 'movie__movielens_id', 'score'
+    )
+    size = qs.count()
+    user_ids = np.empty(size, dtype=np.int64)
+    movie_ids = np.empty(size, dtype=np.int64)
+    scores = np.empty(size, dtype=np.float32)
+
+    n = 0
+    for user_id, movie_id, score in qs.iterator(chunk_size=50_000):
+        if n == size:  # rows added since the count
+            break
+        if not movie_id.isdecimal():  # not a MovieLens id
+            continue
+        user_ids[n], movie_ids[n], scores[n] = user_id, int(movie_id), score
+        n += 1
+
+    return pd.DataFrame(
+        {'userId': user_ids[:n], 'movieId': movie_ids[:n], 'rating': scores[:n]},
+        copy=False,
     )
-    df = pd.DataFrame(list(qs), columns=['userId', 'movieId', 'rating'])
-    return df
 
 
-def train_and_save_model(n_factors=50, reg_all=0.02):
+def train_and_save_model(n_factors=50, reg_users=15, reg_items=10, bias_epochs=10):
     """
-    Trains an SVD model on all ratings and saves the pickle.
+    Fits a biased matrix-factorisation model on all ratings and saves its
+    inference arrays. User/item biases come from regularised alternating
+    least squares (Surprise's baseline estimate); the factors are a
+    truncated sparse SVD of what the biases leave unexplained.
     """
-    # 1. Load ratings into Surprise dataset
+    # 1. Load ratings and map raw ids to dense inner ids
     df = _get_ratings_df()
-    reader = Reader(rating_scale=(0.5, 5.0))
-    data = Dataset.load_from_df(df[['userId', 'movieId', 'rating']], reader)
-    trainset = data.build_full_trainset()
-
-    # 2. Train SVD
-    algo = SVD(n_factors=n_factors, reg_all=reg_all, random_state=42)
-    algo.fit(trainset)
-
-    # 3. Save locally
-    model_dir = os.path.join(settings.BASE_DIR, 'recommendations', 'models')
-    os.makedirs(model_dir, exist_ok=True)
-    file_path = os.path.join(model_dir, 'svd_model.pkl')
-    with open(file_path, 'wb') as f:
-        pickle.dump(algo, f)
-
-    # 4. Save to Django storage
-    storage_path = 'recommendations/models/svd_model.pkl'
-    data_bytes = pickle.dumps(algo)
-    if default_storage.exists(storage_path):
-        default_storage.delete(storage_path)
-    default_storage.save(storage_path, ContentFile(data_bytes))
+    user_ids, u = np.unique(df['userId'].to_numpy(), return_inverse=True)
+    item_ids, i = np.unique(df['movieId'].to_numpy(), return_inverse=True)
+    r = df['rating'].to_numpy(dtype=np.float64)
+    n_users, n_items = len(user_ids), len(item_ids)
+    global_mean = r.mean()
+
+    # 2. Biases: closed-form updates, alternating between items and users
+    bu, bi = np.zeros(n_users), np.zeros(n_items)
+    n_u = np.bincount(u, minlength=n_users)
+    n_i = np.bincount(i, minlength=n_items)
+    for _ in range(bias_epochs):
+        bi = np.bincount(i, r - global_mean - bu[u], minlength=n_items) / (reg_items + n_i)
+        bu = np.bincount(u, r - global_mean - bi[i], minlength=n_users) / (reg_users + n_u)
+
+    # 3. Factors: truncated SVD (ARPACK/LAPACK) of the sparse residual matrix
+    residuals = csr_matrix(
+        (r - global_mean - bu[u] - bi[i], (u, i)), shape=(n_users, n_items)
+    )
+    k = min(n_factors, min(residuals.shape) - 1)
+    U, sigma, Vt = svds(residuals, k=k, rng=np.random.default_rng(42))
+    root = np.sqrt(sigma)
+
+    model = SVDModel(
+        pu=(U * root).astype(np.float16),
+        qi=(Vt.T * root).astype(np.float16),
+        bu=bu.astype(np.float32),
+        bi=bi.astype(np.float32),
+        user_ids=user_ids,
+        item_ids=item_ids,
+        meta=np.array([global_mean, *RATING_SCALE], dtype=np.float32),
+    )
+
+    # 4. Export the inference arrays locally (memory-mappable .npy files)
+    with _export_lock():
+        _publish_arrays(model)
+
+    # 5. Save the same arrays to Django storage as one .npz, streamed from a
+    #    temp file rather than built up (and copied) in memory
+    with tempfile.TemporaryFile() as tmp:
+        np.savez(tmp, **model.arrays())
+        tmp.seek(0)
+        if default_storage.exists(MODEL_STORAGE_PATH):
+            default_storage.delete(MODEL_STORAGE_PATH)
+        default_storage.save(MODEL_STORAGE_PATH, File(tmp))
 
     # Reset cache
-    global _cached_model
+    global _cached_model, _cached_item_index
     _cached_model = None
-    return algo
+    _cached_item_index = None
+    return model
+
+
+@contextmanager
+def _export_lock():
+    """
+    Exclusive lock around publishing the model arrays, so workers starting
+    together don't all unpack or convert the same model, and a retrain
+    doesn't race them. No-op where fcntl
+    is unavailable; concurrent exports are still safe, just redundant.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(MODEL_ARRAYS_DIR + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _current_arrays_dir():
+    """The live model's array directory, or None if none was published yet."""
+    try:
+        with open(CURRENT_MODEL_FILE) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(MODEL_ARRAYS_DIR, version)
+
+
+def _publish_arrays(model):
+    """
+    Saves the model into a new versioned directory, then atomically points
+    CURRENT_MODEL_FILE at it, so load_model() only ever sees complete
+    directories. Older versions are removed, except the one just replaced:
+    a worker may have read the old pointer and not have mapped its files yet.
+    Call with _export_lock() held.
+    """
+    os.makedirs(MODEL_ARRAYS_DIR, exist_ok=True)
+    previous = _current_arrays_dir()
+
+    version = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=MODEL_ARRAYS_DIR)
+    model.save(tmp_dir)
+    os.rename(tmp_dir, os.path.join(MODEL_ARRAYS_DIR, version))
+
+    fd, tmp_pointer = tempfile.mkstemp(prefix='.current-', dir=MODEL_ARRAYS_DIR)
+    with os.fdopen(fd, 'w') as f:
+        f.write(version)
+    os.replace(tmp_pointer, CURRENT_MODEL_FILE)
+
+    keep = {version, previous and os.path.basename(previous)}
+    for entry in os.scandir(MODEL_ARRAYS_DIR):
+        if entry.is_dir() and entry.name not in keep:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _export_arrays():
+    if default_storage.exists(MODEL_STORAGE_PATH):
+        # Unpack the shared copy into the local artifact directory
+        with default_storage.open(MODEL_STORAGE_PATH, 'rb') as f, np.load(f) as npz:
+            model = SVDModel(**{name: npz[name] for name in npz.files})
+    else:
+        # One-off export of a model trained before the arrays existed
+        logger.warning("No exported SVD arrays found; converting the legacy pickle.")
+        with open(LEGACY_MODEL_PATH, 'rb') as f:
+            model = SVDModel.from_algo(pickle.load(f))
+    _publish_arrays(model)
 
 
 def load_model():
     """
-    Loads the trained SVD model, caching it for future calls.
+    Loads the trained SVDModel, caching it for future calls. The arrays are
+    memory-mapped, so their pages are shared by every process on the host.
     """
     global _cached_model
     if _cached_model:
         return _cached_model
 
-    # Try local filesystem first
-    file_path = os.path.join(settings.BASE_DIR, 'recommendations', 'models', 'svd_model.pkl')
-    if os.path.exists(file_path):
-        with open(file_path, 'rb') as f:
-            model = pickle.load(f)
-    else:
-        # Fallback to Django storage
-        storage_path = 'recommendations/models/svd_model.pkl'
-        with default_storage.open(storage_path, 'rb') as f:
-            model = pickle.load(f)
+    arrays_dir = _current_arrays_dir()
+    if arrays_dir is None:
+        with _export_lock():
+            # Another worker may have exported while we waited for the lock
+            if _current_arrays_dir() is None:
+                _export_arrays()
+        arrays_dir = _current_arrays_dir()
 
-    _cached_model = model
-    return model
+    _cached_model = SVDModel.load(arrays_dir)
+    return _cached_model
 
 
 def predict_rating(user_id, movie_id):
@@ -92,49 +326,98 @@ def predict_rating(user_id, movie_id):
     Predict a rating for a given user and movie.
     Returns the estimated rating.
     """
-    algo = load_model()
-    # Surprise expects raw ids as they were trained (ints or strings)
-    return algo.predict(str(user_id), str(movie_id)).est
+    model = load_model()
+    # Raw ids as they were trained: the user's pk and the movielens_id
+    return model.predict(int(user_id), int(movie_id))
+
+
+def _get_item_index(model):
+    """
+    Returns (movie_pks, inner_iids, pk_to_pos): parallel arrays pairing every
+    Movie the model was trained on with its row in model.qi / model.bi, plus
+    a dense Movie.pk -> position array (-1 where the movie isn't scored) for
+    O(1) lookups by pk. Items were trained on movielens_id, so this is
+    Movie.pk -> movielens_id -> inner id. Built once per loaded model.
+    """
+    global _cached_item_index
+    if _cached_item_index is None:
+        item_index = model.item_index
+        pairs = [
+            (pk, item_index[int(mlid)])
+            for pk, mlid in Movie.objects.filter(movielens_id__isnull=False)
+                                         .values_list('id', 'movielens_id')
+            if mlid.isdecimal() and int(mlid) in item_index
+        ]
+        movie_pks = np.fromiter((pk for pk, _ in pairs), dtype=np.int64, count=len(pairs))
+        inner_iids = np.fromiter((iid for _, iid in pairs), dtype=np.int64, count=len(pairs))
+        pk_to_pos = np.full(movie_pks.max(initial=-1) + 1, -1, dtype=np.int32)
+        pk_to_pos[movie_pks] = np.arange(len(movie_pks), dtype=np.int32)
+        _cached_item_index = (movie_pks, inner_iids, pk_to_pos)
+    return _cached_item_index
 
 
 def get_top_n_recommendations(user_id, n=10):
     """
-    Returns top-n movie recommendations (Movie instances, estimated rating) for the user.
+    Returns top-n movie recommendations (movie pk, estimated rating) for the user.
+    Scores every unrated movie in one vectorised pass with SVDModel.predict_batch.
     """
-    algo = load_model()
+    model = load_model()
+    movie_pks, inner_iids, pk_to_pos = _get_item_index(model)
 
     # Candidate movies = those not rated by user
-    rated = set(
-        Rating.objects.filter(user_id=user_id).values_list('movie__id', flat=True)
+    rated = np.fromiter(
+        Rating.objects.filter(user_id=user_id).values_list('movie_id', flat=True), dtype=np.int64
     )
-    candidates = Movie.objects.exclude(id__in=rated).values_list('id', flat=True)
+    rated_pos = pk_to_pos[rated[rated < len(pk_to_pos)]]
+    mask = np.ones(len(movie_pks), dtype=bool)
+    mask[rated_pos[rated_pos >= 0]] = False
+    cand_pks, cand_iids = movie_pks[mask], inner_iids[mask]
+    if not len(cand_pks):
+        return []
 
-    # Batch predict
-    preds = [(mid, algo.predict(str(user_id), str(mid)).est) for mid in candidates]
-    preds.sort(key=lambda x: x[1], reverse=True)
+    # Users were trained on their integer pk
+    scores = model.predict_batch(model.user_index.get(user_id), cand_iids)
 
-    top = preds[:n]
-    # Fetch in bulk
-    movie_ids = [mid for mid, _ in top]
-    movies = Movie.objects.in_bulk(movie_ids)
-    return [(movies[mid], rating) for mid, rating in top]
+    # Partial selection of the n best, then sort just those
+    n = min(n, len(scores))
+    top = np.argpartition(-scores, n - 1)[:n]
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return list(zip(cand_pks[top].tolist(), scores[top].tolist()))
 
 
 def recommend_based_on_genres(user_id, n=10):
     """
-    Recommends movies based on user's preferred genres. Falls back to top-rated if none.
+    Recommends movies (movie pk, average rating) based on user's preferred genres.
+    Falls back to top-rated if none.
     """
-    user = User.objects.get(id=user_id)
-    prefs = list(user.preferred_genres.values_list('name', flat=True))
+    # Genre ids straight off the through table; no User row needed
+    prefs = [
+        genre_id
+        for genre_id in User.objects.filter(id=user_id).order_by().values_list('preferred_genres__id', flat=True)
+        if genre_id is not None
+    ]
 
     if not prefs:
-        qs = Movie.objects.order_by('-average_rating')[:n]
-        return [(m, m.average_rating) for m in qs]
-
-    # Filter movies matching any preferred genre
-    qs = Movie.objects.filter(genres__name__in=prefs).distinct()
-    # Annotate match count
-    qs = qs.annotate(
-        match_count=Count('genres', filter=Q(genres__name__in=prefs))
-    ).order_by('-match_count', '-average_rating')[:n]
-    return [(m, m.average_rating) for m in qs]
+        return list(Movie.objects.order_by('-average_rating').values_list('id', 'average_rating')[:n])
+
+    # Grouping by movie already yields one row each, so no DISTINCT pass
+    qs = Movie.objects.filter(genres__in=prefs).annotate(
+        match_count=Count('genres', filter=Q(genres__in=prefs), distinct=True)
+    ).order_by('-match_count', '-average_rating')
+    return list(qs.values_list('id', 'average_rating')[:n])
+
+
+def compute_user_recommendations(user_id, n=10):
+    """
+    Computes the user's top-n (movie pk, score) pairs and caches them.
+    Collaborative if the user has more than 5 ratings, otherwise genre-based.
+    """
+    # Counting stops at the 6th rating; that's all the threshold needs
+    if Rating.objects.filter(user_id=user_id).order_by().values('pk')[:6].count() > 5:
+        pairs = get_top_n_recommendations(user_id, n=n)
+    else:
+        pairs = recommend_based_on_genres(user_id, n=n)
+    cache.set(
+        RECOMMENDATIONS_CACHE_KEY.format(user_id=user_id), pairs, RECOMMENDATIONS_CACHE_TIMEOUT
+    )
+    return pairs
@@ -1,11 +1,15 @@
 # recommendations/views.py
 
+import hashlib
 from datetime import date
+from functools import partial
 
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, serializers, viewsets
 from rest_framework.decorators import action
-from django.db.models import Prefetch, Count
+from django.db import transaction
+from django.db.models import Prefetch, Count, Q
 from rest_framework.views import APIView
 from django.core.cache import cache
 from rest_framework.response import Response
@@ -19,13 +23,15 @@ from drf_spectacular.utils import (
     OpenApiParameter,
 )
 
-from recommendations.models import Genre, Movie, Watchlist, Rating
+from recommendations.models import Comment, Genre, GenreTopMovie, Movie, Watchlist, Rating
 from recommendations.serializers import (
     MovieCardSerializer,
     MovieDetailSerializer,
     WatchlistSerializer,
     MovieRecommendationSerializer,
     MovieMiniSerializer,
+    MOVIE_MINI_FIELDS,
+    movie_mini_row,
     RatingSerializer,
     CommentSerializer,
     MovieWatchlistSerializer,
@@ -33,7 +39,8 @@ from recommendations.serializers import (
     
 
 )
-from recommendations.utils import get_top_n_recommendations, recommend_based_on_genres
+from recommendations.tasks import schedule_average_refresh, schedule_recommendations_refresh
+from recommendations.utils import RECOMMENDATIONS_CACHE_KEY, compute_user_recommendations
 
 
 @extend_schema(
@@ -64,6 +71,11 @@ class MovieSearchView(generics.ListAPIView):
     serializer_class = MovieMiniSerializer
     permission_classes = [permissions.AllowAny]
 
+    # Results per (case-folded) term, shared by every user; versioned like the
+    # genre pages so edited or removed movies drop out
+    CACHE_KEY = "movies:search:v{version}:{digest}"
+    CACHE_TIMEOUT = 300
+
     def list(self, request, *args, **kwargs):
         q = request.query_params.get("q", "").strip()
         if not q:
@@ -71,11 +83,26 @@ class MovieSearchView(generics.ListAPIView):
                 {"detail": "Query parameter `q` is required."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        # filter & order
-        qs = Movie.objects.filter(title__icontains=q).order_by()[:50]
-        
-        serializer = self.get_serializer(qs, many=True, context={"request": request})
-        return Response(serializer.data)
+        # icontains ignores case, so terms differing only in case share a key
+        digest = hashlib.blake2b(q.lower().encode(), digest_size=16).hexdigest()
+        movies = cache.get_or_set(
+            self.CACHE_KEY.format(version=GenreTopMovie.cache_version(), digest=digest),
+            lambda: [
+                movie_mini_row(values)
+                for values in Movie.objects.filter(title__icontains=q)
+                .order_by().values_list(*MOVIE_MINI_FIELDS)[:50]
+            ],
+            timeout=self.CACHE_TIMEOUT,
+        )
+
+        # the only per-user part: which of these movies are on the watchlist
+        watchlisted = set()
+        if request.user.is_authenticated and movies:
+            watchlisted = set(Watchlist.objects.filter(
+                user=request.user, movie_id__in=[movie['id'] for movie in movies],
+            ).values_list('movie_id', flat=True))
+
+        return Response([{**movie, "in_watchlist": movie['id'] in watchlisted} for movie in movies])
 
 
 @extend_schema(
@@ -109,43 +136,96 @@ class GenresView(APIView):
     BATCH_SIZE = 10
     CACHE_KEY = "genre_{genre_pk}_offset"
     CACHE_TIMEOUT = None
+    # Genre list and serialized batches, shared by every user. The version
+    # changes whenever the rankings are refreshed or a movie is edited.
+    GENRES_CACHE_KEY = "genres:v{version}:list"
+    BATCH_CACHE_KEY = "genres:v{version}:{genre_pk}:{offset}"
+    PAYLOAD_CACHE_TIMEOUT = 300
 
     def get(self, request):
-        payload = []
+        version = GenreTopMovie.cache_version()
+
         # We want to know total count per genre to wrap around; annotate helps
-        genres = Genre.objects.annotate(total_movies=Count('movies'))
-        for genre in genres:
-            total = genre.total_movies
-            # no movies → just empty list
-            if total == 0:
-                batch = []
-            else:
-                # fetch our current offset from cache (default 0)
-                cache_key = self.CACHE_KEY.format(genre_pk=genre.pk)
-                offset = cache.get(cache_key, 0)
+        genres = cache.get_or_set(
+            self.GENRES_CACHE_KEY.format(version=version),
+            lambda: list(Genre.objects.annotate(total_movies=Count('movies')).values(
+                'id', 'name', 'slug', 'total_movies'
+            )),
+            timeout=self.PAYLOAD_CACHE_TIMEOUT,
+        )
 
-                # grab the next slice by average_rating
-                qs = genre.movies.order_by('-average_rating')
-                batch = list(qs[offset: offset + self.BATCH_SIZE])
+        # fetch every genre's current offset from cache (default 0)
+        cache_keys = {genre['id']: self.CACHE_KEY.format(genre_pk=genre['id']) for genre in genres}
+        cached_offsets = cache.get_many(cache_keys.values())
+        offsets = {pk: cached_offsets.get(key, 0) for pk, key in cache_keys.items()}
 
+        # serialized batches for those offsets; build only the ones not cached yet
+        batch_keys = {
+            genre['id']: self.BATCH_CACHE_KEY.format(version=version, genre_pk=genre['id'], offset=offsets[genre['id']])
+            for genre in genres if genre['total_movies']
+        }
+        cached_batches = cache.get_many(batch_keys.values())
+        batches = {pk: cached_batches[key] for pk, key in batch_keys.items() if key in cached_batches}
+        missing = [pk for pk in batch_keys if pk not in batches]
+        if missing:
+            batches.update(self.build_batches({pk: offsets[pk] for pk in missing}))
+            cache.set_many(
+                {batch_keys[pk]: batches[pk] for pk in missing},
+                timeout=self.PAYLOAD_CACHE_TIMEOUT,
+            )
+
+        # the only per-user part: which of these movies are on the watchlist
+        watchlisted = set()
+        if request.user.is_authenticated:
+            watchlisted = set(Watchlist.objects.filter(
+                user=request.user,
+                movie_id__in=[movie['id'] for batch in batches.values() for movie in batch],
+            ).values_list('movie_id', flat=True))
+
+        payload = []
+        next_offsets = {}
+        for genre in genres:
+            # no movies → just empty list
+            if genre['total_movies']:
                 # compute next offset and wrap
-                next_offset = offset + self.BATCH_SIZE
-                if next_offset >= total:
+                next_offset = offsets[genre['id']] + self.BATCH_SIZE
+                if next_offset >= genre['total_movies']:
                     next_offset = 0
+                next_offsets[cache_keys[genre['id']]] = next_offset
 
-                # store for next time
-                cache.set(cache_key, next_offset, timeout=self.CACHE_TIMEOUT)
-
-            serializer = MovieMiniSerializer(batch, many=True, context={'request': request})
             payload.append({
-                "id":     genre.id,
-                "name":   genre.name,
-                "slug":   genre.slug,
-                "movies": serializer.data,
+                "id":     genre['id'],
+                "name":   genre['name'],
+                "slug":   genre['slug'],
+                "movies": [
+                    {**movie, "in_watchlist": movie['id'] in watchlisted}
+                    for movie in batches.get(genre['id'], [])
+                ],
             })
 
+        # store for next time
+        cache.set_many(next_offsets, timeout=self.CACHE_TIMEOUT)
+
         return Response(payload)
 
+    def build_batches(self, offsets):
+        """
+        Serialized movies of each genre's next slice (genre pk -> offset), read
+        by rank from the precomputed view in one query. in_watchlist is left
+        False for get() to fill in per user.
+        """
+        # grab each genre's next slice by rank from the precomputed view, all in one query
+        windows = Q()
+        for genre_pk, offset in offsets.items():
+            windows |= Q(genre_id=genre_pk, rank__gt=offset, rank__lte=offset + self.BATCH_SIZE)
+        rows = GenreTopMovie.objects.filter(windows).values_list(
+            'genre_id', *(f'movie__{field}' for field in MOVIE_MINI_FIELDS)
+        )
+        batches = {genre_pk: [] for genre_pk in offsets}
+        for genre_id, *values in rows:
+            batches[genre_id].append(movie_mini_row(values))
+        return batches
+
 
 
 
@@ -184,30 +264,34 @@ class GenreDetailView(APIView):
 
     def get(self, request, slug):
         today = date.today().year
-        genre = get_object_or_404(
-            Genre.objects.prefetch_related('movies'),
-            slug=slug
+        genre = get_object_or_404(Genre, slug=slug)
+
+        # One query for all three sections: the genre's ranking, cut down to the
+        # all-time top 10 plus everything released this year or last. Rows come
+        # back in rank order, so each section is just its first 10 matches.
+        rows = GenreTopMovie.objects.filter(genre=genre).filter(
+            Q(rank__lte=10)
+            | Q(release_date__gte=date(today - 1, 1, 1), release_date__lte=date(today, 12, 31))
+        ).annotate(
+            in_watchlist=Watchlist.contains(request.user, 'movie_id')
+        ).values_list(
+            'rank', 'release_date', 'in_watchlist',
+            *(f'movie__{field}' for field in MOVIE_MINI_FIELDS),
         )
-        qs = genre.movies.all()
+
+        top_rated, by_year = [], {today: [], today - 1: []}
+        for rank, release_date, in_watchlist, *values in rows:
+            movie = movie_mini_row(values, in_watchlist)
+            if rank <= 10:
+                top_rated.append(movie)
+            year = release_date.year if release_date else None
+            if year in by_year and len(by_year[year]) < 10:
+                by_year[year].append(movie)
+
         movies = [
-            {
-                'title': 'Top Rated',
-                'movies': MovieMiniSerializer(qs.order_by('-average_rating')[:10], many=True).data
-            },
-            {
-                'title': f'Popular {today}',
-                'movies': MovieMiniSerializer(
-                    qs.filter(release_date__year=today).order_by('-average_rating')[:10],
-                    many=True
-                ).data
-            },
-            {
-                'title': f'Popular {today - 1}',
-                'movies': MovieMiniSerializer(
-                    qs.filter(release_date__year=today - 1).order_by('-average_rating')[:10],
-                    many=True
-                ).data
-            },
+            {'title': 'Top Rated', 'movies': top_rated},
+            {'title': f'Popular {today}', 'movies': by_year[today]},
+            {'title': f'Popular {today - 1}', 'movies': by_year[today - 1]},
         ]
         return Response({
             'genre': genre.name,
@@ -273,13 +357,26 @@ class MovieViewSet(viewsets.ReadOnlyModelViewSet):
     watchlist:
     POST to add to watchlist; DELETE to remove.
     """
-    queryset = Movie.objects.prefetch_related(
-        'genres', 'comments__user', 'watchlisted_by'
-    )
+    # cast isn't part of any movie response, so its JSON is never fetched
+    queryset = Movie.objects.defer('cast')
     serializer_class = MovieDetailSerializer
     lookup_field = 'slug'
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            # The comment/rate/watchlist actions only need to identify the movie
+            return queryset.only('id', 'slug', 'title')
+        return queryset.prefetch_related(
+            'genres',
+            # Just what CommentSerializer renders, with each author in the same query
+            Prefetch('comments', queryset=Comment.objects.select_related('user').only(
+                'movie_id', 'comment', 'timestamp',
+                'user__id', 'user__first_name', 'user__last_name', 'user__email',
+            )),
+        ).annotate(in_watchlist=Watchlist.contains(self.request.user))
+
     @action(
         detail=True,
         methods=['post'],
@@ -317,12 +414,19 @@ class MovieViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = RatingSerializer(data=data, context={"request": request})
         serializer.is_valid(raise_exception=True)
 
-        # 3️⃣ Upsert: either update existing or create new
-        rating_obj, created = Rating.objects.update_or_create(
-            user=request.user,
-            movie=movie,
-            defaults={"score": serializer.validated_data["score"]},
+        # 3️⃣ Upsert in one INSERT ... ON CONFLICT DO UPDATE
+        rating_obj = Rating(
+            user=request.user, movie=movie, score=serializer.validated_data["score"]
+        )
+        Rating.objects.bulk_create(
+            [rating_obj],
+            update_conflicts=True,
+            unique_fields=["user", "movie"],
+            update_fields=["score", "updated_at"],
         )
+        # bulk_create sends no post_save, so queue what the Rating signals would
+        transaction.on_commit(partial(schedule_average_refresh, movie.pk))
+        transaction.on_commit(partial(schedule_recommendations_refresh, request.user.pk))
 
         # 4️⃣ Return the (fresh) rating through the same serializer
         out = RatingMiniSerializer(rating_obj)
@@ -335,42 +439,23 @@ class MovieViewSet(viewsets.ReadOnlyModelViewSet):
         url_path='watchlist'
     )
     def watchlist(self, request, slug=None):
-        movie = self.get_object()
         if request.method == 'POST':
+            movie = self.get_object()
             item, _ = Watchlist.objects.get_or_create(
                 user=request.user, movie=movie
             )
             return Response(MovieWatchlistSerializer(item).data, status=status.HTTP_201_CREATED)
         else:
-            item = get_object_or_404(
-                Watchlist, user=request.user, movie=movie
-            )
-            item.delete()
+            # One DELETE; nothing removed means no such movie or not on the list
+            deleted, _ = Watchlist.objects.filter(user=request.user, movie__slug=slug).delete()
+            if not deleted:
+                raise Http404
             return Response(
                 {"detail": "Removed from watchlist"},
                 status=status.HTTP_204_NO_CONTENT
             )
 
 
-# @extend_schema(
-#     summary="Movie detail",
-#     description="Retrieve full details for one movie (by slug).",
-#     responses={200: MovieDetailSerializer},
-#     tags=["Movies"],
-# )
-# class MovieDetailView(generics.RetrieveAPIView):
-#     """
-#     Movie full detail, including:
-#     - genres
-#     - comments
-#     - whether it’s in the current user’s watchlist
-#     """
-#     queryset = Movie.objects.prefetch_related('genres', 'comments__user', 'watchlisted_by')
-#     serializer_class = MovieDetailSerializer
-#     lookup_field = 'slug'
-#     permission_classes = [permissions.AllowAny]
-
-
 @extend_schema(
     summary="User watchlist",
     description=(
@@ -398,7 +483,7 @@ class WatchlistView(APIView):
     def get(self, request):
         items = Watchlist.objects.filter(user=request.user) \
             .select_related('movie') \
-            .prefetch_related('movie__genres')
+            .only('movie_id', 'watched', 'added_on', *(f'movie__{field}' for field in MOVIE_MINI_FIELDS))
         return Response(WatchlistSerializer(items, many=True).data)
 
     def post(self, request):
@@ -407,10 +492,11 @@ class WatchlistView(APIView):
         return Response(WatchlistSerializer(item).data, status=status.HTTP_201_CREATED)
 
     def delete(self, request):
-        item = get_object_or_404(
-            Watchlist, user=request.user, movie_id=request.data.get('movie_id')
-        )
-        item.delete()
+        deleted, _ = Watchlist.objects.filter(
+            user=request.user, movie_id=request.data.get('movie_id')
+        ).delete()
+        if not deleted:
+            raise Http404
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -443,15 +529,20 @@ class RecommendMoviesView(APIView):
 
     def get(self, request):
         user = request.user
-        count = Rating.objects.filter(user=user).count()
-        if count > 5:
-            recs = get_top_n_recommendations(user.id, n=10)
-        else:
-            recs = recommend_based_on_genres(user.id, n=10)
-
-        # recs is a list of (Movie, score) tuples
-        movies, scores = zip(*recs)  # unzip into two parallel tuples
-        score_map = {movie.pk: score for movie, score in recs}
+        # (movie pk, score) pairs, kept fresh by recompute_user_recommendations;
+        # only computed here on a cold cache
+        recs = cache.get(RECOMMENDATIONS_CACHE_KEY.format(user_id=user.id))
+        if recs is None:
+            recs = compute_user_recommendations(user.id, n=10)
+
+        score_map = dict(recs)
+        by_id = Movie.objects.only(
+            'id', 'title', 'overview', 'poster_url', 'average_rating'
+        ).prefetch_related(
+            Prefetch('genres', queryset=Genre.objects.only('id'))
+        ).in_bulk(score_map)
+        # in recommendation order; skips movies deleted since they were cached
+        movies = [by_id[pk] for pk in score_map if pk in by_id]
 
         serializer = MovieRecommendationSerializer(
             movies,